@@ -38,14 +38,15 @@ from .database import (
     create_geofence,
     create_user,
     get_account_profile,
-    get_all_positions,
-    get_device,
-    get_device_by_token,
+    get_all_positions_async,
+    get_device_async,
+    get_device_by_token_async,
     get_engine,
     get_geofence,
-    get_latest_position,
+    get_latest_position_async,
+    get_position_coordinates_async,
     get_positions_in_range,
-    get_user,
+    get_user_async,
     init_db,
     list_alerts,
     list_contacts,
@@ -53,6 +54,7 @@ from .database import (
     list_geofences,
     save_account_profile,
     save_position,
+    save_positions_bulk,
     update_geofence,
     delete_geofence,
     log_audit_event,
@@ -60,8 +62,8 @@ from .database import (
 )
 from .observability import Observability, record_ingestion
 from .auth import (
-    verify_password,
-    get_password_hash,
+    verify_password_async,
+    get_password_hash_async,
     create_access_token,
     ACCESS_TOKEN_EXPIRE_MINUTES,
     decode_token,
@@ -71,10 +73,9 @@ from .security import (
     Roles,
     generate_totp_secret,
     verify_totp,
-    sign_payload,
     ensure_role_allowed,
 )
-from .integrations.maps import MapService, parse_coordinate_pair
+from .integrations.maps import MapService, as_geojson, parse_coordinate_pair
 from .integrations.notifications import NotificationMessage, NotificationService
 from .payments import PaymentGateway
 from .protocols import DecodedPosition, decode_with
@@ -195,7 +196,7 @@ class MfaSetupResponse(BaseModel):
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+async def get_current_user(token: str = Depends(oauth2_scheme)):
     if not token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token requerido")
     try:
@@ -205,7 +206,7 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
     username: str | None = payload.get("sub")
     if username is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token sin sujeto")
-    user = get_user(username)
+    user = await get_user_async(username)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuario no encontrado")
     return user
@@ -226,7 +227,7 @@ def ensure_username_access(requested_username: str, user) -> None:
 
 
 def audit(action: str, username: str, payload: dict):
-    return log_audit_event(username, action, payload, signer=lambda p: sign_payload(key_manager.active_audit_key, p))
+    return log_audit_event(username, action, payload, signer=key_manager.sign_audit)
 
 
 class RequestRateLimiter:
@@ -245,6 +246,8 @@ class RequestRateLimiter:
         return len(timestamps) <= self.limit_per_minute
 
 rate_limiter = RequestRateLimiter(limit_per_minute=int(os.getenv("RATE_LIMIT_PER_MINUTE", "120")))
+# El rate limiter cuenta peticiones, no posiciones: se acota también el tamaño de cada lote
+INGEST_BATCH_MAX_SIZE = int(os.getenv("INGEST_BATCH_MAX_SIZE", "500"))
 
 
 @app.middleware("http")
@@ -264,8 +267,8 @@ async def security_headers_and_rate_limit(request: Request, call_next):
     return response
 
 
-def get_user_or_404(username: str):
-    user = get_user(username)
+async def get_user_or_404(username: str):
+    user = await get_user_async(username)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado")
     return user
@@ -297,6 +300,11 @@ class IngestPayload(BaseModel):
         }
 
 
+class IngestBatchResponse(BaseModel):
+    device_id: str
+    ingested: int
+
+
 class DeviceRegistration(BaseModel):
     device_id: str
     token: str
@@ -526,7 +534,7 @@ async def map_route(body: MapRouteRequest):
 @app.get("/devices/{device_id}/latest", response_model=PositionResponse)
 async def latest_position(device_id: str):
     """Devuelve la última posición conocida de un dispositivo."""
-    position = get_latest_position(device_id, engine=get_engine())
+    position = await get_latest_position_async(device_id)
     if not position:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Device not found")
     return PositionResponse.from_orm(position)
@@ -535,10 +543,19 @@ async def latest_position(device_id: str):
 @app.get("/devices/{device_id}/positions", response_model=list[PositionResponse])
 async def all_positions(device_id: str, limit: int = 100):
     """Devuelve un historial de posiciones para un dispositivo."""
-    positions = get_all_positions(device_id, limit=limit, engine=get_engine())
+    positions = await get_all_positions_async(device_id, limit=limit)
     return [PositionResponse.from_orm(pos) for pos in positions]
 
 
+@app.get("/devices/{device_id}/positions/geojson")
+async def positions_geojson(device_id: str, limit: int = 1000):
+    """Devuelve el recorrido reciente de un dispositivo como LineString GeoJSON."""
+    points = await get_position_coordinates_async(device_id, limit=limit)
+    # La consulta trae las ``limit`` más recientes primero; el trazado va en orden cronológico
+    points.reverse()
+    return as_geojson(points)
+
+
 @app.get("/devices/{device_id}/positions/range", response_model=list[PositionResponse])
 async def positions_in_range(device_id: str, start: str, end: str):
     """Devuelve posiciones dentro de un rango temporal para reproducción histórica."""
@@ -561,13 +578,13 @@ async def fleet_live(
     """Vista de mapa en vivo por flota/vehículo con estado principal."""
 
     ensure_username_access(username, current_user)
-    user = get_user_or_404(username)
+    user = await get_user_or_404(username)
     devices = list_devices_for_user(user, engine=get_engine())
     if device_id:
         devices = [d for d in devices if d.id == device_id]
     statuses: list[LiveStatus] = []
     for device in devices:
-        latest = get_latest_position(device.id, engine=get_engine())
+        latest = await get_latest_position_async(device.id)
         statuses.append(
             LiveStatus(
                 device_id=device.id,
@@ -586,10 +603,10 @@ async def fleet_live(
 async def register_user(user: UserCreate):
     """Registra un nuevo usuario con rol predefinido y auditable."""
 
-    existing_user = get_user(user.username)
+    existing_user = await get_user_async(user.username)
     if existing_user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="El nombre de usuario ya existe")
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     role = user.role if user.role in Roles.all() else Roles.CLIENT.value
     new_user = create_user(user.username, hashed_password, role=role)
     audit("user.register", user.username, {"role": role})
@@ -600,8 +617,8 @@ async def register_user(user: UserCreate):
 async def register_device(body: DeviceRegistration):
     """Registra un dispositivo y vincula su token de ingestión a un usuario."""
 
-    user = get_user(body.username)
-    if not user or not verify_password(body.password, user.hashed_password):
+    user = await get_user_async(body.username)
+    if not user or not await verify_password_async(body.password, user.hashed_password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciales incorrectas")
 
     device = create_device(
@@ -621,7 +638,7 @@ async def ingest_http(
 ):
     """Ingesta de posiciones vía HTTP autenticadas por token de dispositivo."""
 
-    device = get_device_by_token(x_device_token)
+    device = await get_device_by_token_async(x_device_token)
     if not device:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token de dispositivo inválido")
 
@@ -644,6 +661,40 @@ async def ingest_http(
     return PositionResponse.from_orm(position)
 
 
+@app.post("/ingest/http/batch", response_model=IngestBatchResponse)
+async def ingest_http_batch(
+    payloads: list[IngestPayload],
+    x_device_token: str = Header(..., alias="X-Device-Token"),
+):
+    """Ingesta por lotes de varias posiciones de un dispositivo en una sola petición.
+
+    Las filas se insertan en bloque y solo se difunde en vivo la posición
+    más reciente del lote, que es la que refleja el estado actual del vehículo.
+    Los lotes de más de ``INGEST_BATCH_MAX_SIZE`` posiciones se rechazan con 413.
+    """
+
+    if len(payloads) > INGEST_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Lote demasiado grande (máximo {INGEST_BATCH_MAX_SIZE} posiciones)",
+        )
+    device = await get_device_by_token_async(x_device_token)
+    if not device:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token de dispositivo inválido")
+
+    rows = [{"device_id": device.id, **payload.normalized()} for payload in payloads]
+    save_positions_bulk(rows, engine=get_engine())
+
+    if rows:
+        record_ingestion(device.id, count=len(rows))
+        # Los payloads pueden traer su propio ``timestamp`` y llegar desordenados
+        latest = max(rows, key=lambda row: row["timestamp"])
+        await broadcaster.broadcast(
+            PositionResponse(**{**latest, "timestamp": latest["timestamp"].isoformat()}).dict()
+        )
+    return IngestBatchResponse(device_id=device.id, ingested=len(rows))
+
+
 @app.post("/ingest/protocol", response_model=PositionResponse)
 async def ingest_protocol(
     payload: ProtocolIngestPayload,
@@ -652,7 +703,7 @@ async def ingest_protocol(
     """Ingresa mensajes crudos de protocolos populares (Teltonika/Queclink/Concox)."""
 
     decoded: DecodedPosition = decode_with(payload.protocol, payload.payload.encode())
-    device = get_device_by_token(x_device_token)
+    device = await get_device_by_token_async(x_device_token)
     if not device:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token de dispositivo inválido")
     if decoded.device_id and decoded.device_id != device.id:
@@ -680,7 +731,7 @@ async def create_geofence_endpoint(
     """Crea una geocerca definida por el usuario."""
 
     ensure_username_access(payload.username, current_user)
-    user = get_user_or_404(payload.username)
+    user = await get_user_or_404(payload.username)
     geofence = create_geofence(
         user=user,
         name=payload.name,
@@ -695,7 +746,7 @@ async def create_geofence_endpoint(
 
 @app.get("/geofences", response_model=list[GeofenceResponse])
 async def list_geofences_endpoint(username: str, current_user=Depends(require_roles(Roles.ADMIN, Roles.OPERATOR, Roles.CLIENT))):
-    user = get_user_or_404(username)
+    user = await get_user_or_404(username)
     ensure_username_access(username, current_user)
     geofences = list_geofences(user, engine=get_engine())
     return [GeofenceResponse.from_orm(g) for g in geofences]
@@ -707,7 +758,7 @@ async def update_geofence_endpoint(
     payload: GeofencePayload,
     current_user=Depends(require_roles(Roles.ADMIN, Roles.OPERATOR)),
 ):
-    user = get_user_or_404(payload.username)
+    user = await get_user_or_404(payload.username)
     ensure_username_access(payload.username, current_user)
     geofence = get_geofence(geofence_id, user=user, engine=get_engine())
     if not geofence:
@@ -730,7 +781,7 @@ async def delete_geofence_endpoint(
     username: str,
     current_user=Depends(require_roles(Roles.ADMIN, Roles.OPERATOR)),
 ):
-    user = get_user_or_404(username)
+    user = await get_user_or_404(username)
     ensure_username_access(username, current_user)
     geofence = get_geofence(geofence_id, user=user, engine=get_engine())
     if not geofence:
@@ -745,7 +796,7 @@ async def create_contact_endpoint(
     payload: ContactPayload,
     current_user=Depends(require_roles(Roles.ADMIN, Roles.OPERATOR, Roles.CLIENT)),
 ):
-    user = get_user_or_404(payload.username)
+    user = await get_user_or_404(payload.username)
     ensure_username_access(payload.username, current_user)
     contact = create_contact(
         user=user,
@@ -763,7 +814,7 @@ async def create_contact_endpoint(
 async def list_contacts_endpoint(
     username: str, current_user=Depends(require_roles(Roles.ADMIN, Roles.OPERATOR, Roles.CLIENT))
 ):
-    user = get_user_or_404(username)
+    user = await get_user_or_404(username)
     ensure_username_access(username, current_user)
     contacts = list_contacts(user, engine=get_engine())
     return [ContactResponse.from_orm(contact) for contact in contacts]
@@ -774,7 +825,7 @@ async def create_alert_endpoint(
     payload: AlertPayload,
     current_user=Depends(require_roles(Roles.ADMIN, Roles.OPERATOR, Roles.CLIENT)),
 ):
-    user = get_user_or_404(payload.username)
+    user = await get_user_or_404(payload.username)
     ensure_username_access(payload.username, current_user)
     geofence = None
     if payload.geofence_id is not None:
@@ -803,7 +854,7 @@ async def create_alert_endpoint(
 async def list_alerts_endpoint(
     username: str, current_user=Depends(require_roles(Roles.ADMIN, Roles.OPERATOR, Roles.CLIENT))
 ):
-    user = get_user_or_404(username)
+    user = await get_user_or_404(username)
     ensure_username_access(username, current_user)
     alerts = list_alerts(user, engine=get_engine())
     return [AlertResponse.from_orm(alert) for alert in alerts]
@@ -903,8 +954,8 @@ async def download_report(
     """Genera reportes descargables (rutas, paradas, excesos de velocidad, uso horario)."""
 
     ensure_username_access(username, current_user)
-    user = get_user_or_404(username)
-    device = get_device(device_id, engine=get_engine())
+    user = await get_user_or_404(username)
+    device = await get_device_async(device_id)
     if not device or device.user_id != user.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Dispositivo no encontrado")
 
@@ -935,7 +986,7 @@ async def update_account_profile(
     body: AccountProfilePayload, current_user=Depends(require_roles(Roles.ADMIN, Roles.OPERATOR, Roles.CLIENT))
 ):
     ensure_username_access(body.username, current_user)
-    user = get_user_or_404(body.username)
+    user = await get_user_or_404(body.username)
     profile = save_account_profile(
         user,
         full_name=body.full_name,
@@ -955,7 +1006,7 @@ async def get_account_profile_endpoint(
     username: str, current_user=Depends(require_roles(Roles.ADMIN, Roles.OPERATOR, Roles.CLIENT, Roles.DRIVER_VIEW))
 ):
     ensure_username_access(username, current_user)
-    user = get_user_or_404(username)
+    user = await get_user_or_404(username)
     profile = get_account_profile(user, engine=get_engine())
     if not profile:
         profile = save_account_profile(user, engine=get_engine())
@@ -1024,8 +1075,8 @@ if MULTIPART_AVAILABLE:
     ):
         """Genera un token de acceso para un usuario autenticado con MFA opcional."""
 
-        user = get_user(form_data.username)
-        if not user or not verify_password(form_data.password, user.hashed_password):
+        user = await get_user_async(form_data.username)
+        if not user or not await verify_password_async(form_data.password, user.hashed_password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Credenciales incorrectas",
@@ -1051,8 +1102,8 @@ else:
     async def login_for_access_token_json(body: LoginBody, x_mfa_code: str | None = Header(None, alias="X-MFA-Code")):
         """Alternativa JSON cuando no está disponible python-multipart."""
 
-        user = get_user(body.username)
-        if not user or not verify_password(body.password, user.hashed_password):
+        user = await get_user_async(body.username)
+        if not user or not await verify_password_async(body.password, user.hashed_password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Credenciales incorrectas",
@@ -6,6 +6,7 @@ para la autenticación de usuarios. Utiliza passlib para gestionar los
 hashes y python-jose para firmar tokens.
 """
 
+import asyncio
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -32,6 +33,20 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Variante de ``verify_password`` que ejecuta bcrypt en un hilo aparte.
+
+    bcrypt consume cientos de milisegundos de CPU; ejecutarlo en el bucle de
+    eventos bloquearía al resto de peticiones del worker.
+    """
+    return await asyncio.to_thread(pwd_context.verify, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Variante de ``get_password_hash`` que no bloquea el bucle de eventos."""
+    return await asyncio.to_thread(pwd_context.hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Crea un token JWT con una expiración opcional usando la clave activa."""
 
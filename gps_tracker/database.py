@@ -6,10 +6,12 @@ configurables como geocercas, alertas y contactos. Utiliza SQLite
 por defecto para facilitar las pruebas locales.
 """
 
+import asyncio
 import json
 import os
 from datetime import datetime, timedelta
-from typing import Optional
+from functools import lru_cache
+from typing import Any, Callable, Optional
 
 from sqlalchemy import (
     Boolean,
@@ -20,10 +22,16 @@ from sqlalchemy import (
     String,
     Text,
     ForeignKey,
+    Index,
     create_engine,
+    select,
+    text,
 )
+from sqlalchemy.engine import Result, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import Session, sessionmaker, relationship
+from sqlalchemy.pool import NullPool, StaticPool
 
 
 # Crea la base declarativa para los modelos
@@ -52,6 +60,12 @@ class Position(Base):
         )
 
 
+# Historial por dispositivo ordenado por fecha (última posición, reproducción)
+_POSITIONS_DEVICE_TIME_INDEX = Index(
+    "ix_positions_device_id_timestamp", Position.device_id, Position.timestamp.desc()
+)
+
+
 class User(Base):
     """Modelo que representa un usuario de la aplicación."""
 
@@ -173,12 +187,52 @@ def get_engine(db_url: str | None = None):
     Se prioriza la variable de entorno ``DATABASE_URL`` y se cae en SQLite
     para entornos locales cuando no está definida. Si se utiliza SQLite,
     se agregan los ``connect_args`` adecuados para permitir conexiones
-    multi-hilo durante pruebas o desarrollo.
+    multi-hilo durante pruebas o desarrollo. Una SQLite en memoria (p. ej.
+    ``sqlite:///file:gps?mode=memory&cache=shared&uri=true``) usa una única
+    conexión compartida, que es la que mantiene viva la base.
+
+    El motor (y su pool de conexiones) se crea una sola vez por URL y se
+    reutiliza en llamadas posteriores.
     """
 
-    url = db_url or os.getenv("DATABASE_URL", "sqlite:///./gps_data.db")
-    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
-    return create_engine(url, connect_args=connect_args, pool_pre_ping=True)
+    return _create_engine(db_url or _database_url())
+
+
+@lru_cache(maxsize=None)
+def _create_engine(url: str):
+    if url.startswith("sqlite"):
+        options = {"poolclass": StaticPool} if _is_sqlite_memory(url) else {}
+        return create_engine(
+            url,
+            connect_args={"check_same_thread": False},
+            pool_pre_ping=True,
+            query_cache_size=1200,
+            **options,
+        )
+    # Pool dimensionado para ráfagas del servidor GPS y la API en PostgreSQL
+    return create_engine(
+        url,
+        pool_pre_ping=True,
+        pool_size=int(os.getenv("DB_POOL_SIZE", "20")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "40")),
+        pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        pool_timeout=int(os.getenv("DB_POOL_TIMEOUT", "5")),
+        query_cache_size=1200,
+    )
+
+
+def _database_url() -> str:
+    return os.getenv("DATABASE_URL", "sqlite:///./gps_data.db")
+
+
+def _is_sqlite_memory(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.database in (None, "", ":memory:") or parsed.query.get("mode") == "memory"
+
+
+def _is_private_sqlite_memory(url: str) -> bool:
+    # Sin ``cache=shared`` la base en memoria solo existe en la conexión del motor síncrono
+    return url.startswith("sqlite") and _is_sqlite_memory(url) and make_url(url).query.get("cache") != "shared"
 
 
 def init_db(engine=None) -> None:
@@ -186,17 +240,216 @@ def init_db(engine=None) -> None:
     if engine is None:
         engine = get_engine()
     Base.metadata.create_all(bind=engine)
+    # ``create_all`` no añade índices a tablas que ya existían antes del índice
+    _POSITIONS_DEVICE_TIME_INDEX.create(bind=engine, checkfirst=True)
+    if os.getenv("TIMESCALEDB_ENABLED", "").lower() in {"1", "true", "yes"}:
+        enable_positions_hypertable(engine)
     retention_days = int(os.getenv("RETENTION_DAYS", "0"))
     if retention_days:
         purge_positions_older_than(retention_days, engine=engine)
 
 
+def enable_positions_hypertable(engine, compress_after_days: int = 7) -> None:
+    """Convierte ``positions`` en hypertable de TimescaleDB (solo PostgreSQL).
+
+    Particiona por ``timestamp`` en chunks diarios y comprime los chunks más
+    antiguos que ``compress_after_days``. Es idempotente: si la tabla ya es
+    una hypertable no se modifica nada.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS timescaledb"))
+        already = conn.execute(
+            text(
+                "SELECT 1 FROM timescaledb_information.hypertables "
+                "WHERE hypertable_name = 'positions'"
+            )
+        ).first()
+        if already:
+            return
+        # Las claves únicas de una hypertable deben incluir la columna de partición
+        conn.execute(text("ALTER TABLE positions DROP CONSTRAINT IF EXISTS positions_pkey"))
+        conn.execute(text("ALTER TABLE positions ADD PRIMARY KEY (id, timestamp)"))
+        conn.execute(
+            text(
+                "SELECT create_hypertable('positions', 'timestamp', "
+                "chunk_time_interval => INTERVAL '1 day', migrate_data => TRUE)"
+            )
+        )
+        conn.execute(
+            text(
+                "ALTER TABLE positions SET (timescaledb.compress, "
+                "timescaledb.compress_segmentby = 'device_id', "
+                "timescaledb.compress_orderby = 'timestamp DESC')"
+            )
+        )
+        conn.execute(
+            text("SELECT add_compression_policy('positions', make_interval(days => :days))"),
+            {"days": compress_after_days},
+        )
+
+
+@lru_cache(maxsize=8)
+def _session_factory(engine) -> sessionmaker:
+    """Construye (una sola vez por motor) la fábrica de sesiones."""
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
 def get_session(engine=None) -> Session:
     """Devuelve una sesión de base de datos lista para usar."""
     if engine is None:
         engine = get_engine()
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    return SessionLocal()
+    return _session_factory(engine)()
+
+
+# Acceso asíncrono para los handlers de FastAPI
+
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def get_async_engine(db_url: str | None = None):
+    """Motor asíncrono equivalente a ``get_engine`` (aiosqlite/asyncpg).
+
+    Se deriva de la misma ``DATABASE_URL`` sustituyendo el driver, de modo
+    que la API y el resto de componentes apuntan siempre a la misma base.
+    """
+
+    return _create_async_engine(db_url or _database_url())
+
+
+# Parámetros libpq (psycopg2) con otro nombre en asyncpg; las demás opciones
+# libpq no las acepta ``asyncpg.connect`` y se descartan.
+_LIBPQ_TO_ASYNCPG = {"sslmode": "ssl", "connect_timeout": "timeout"}
+_ASYNCPG_OPTION_TYPES = {
+    "ssl": str,
+    "passfile": str,
+    "target_session_attrs": str,
+    "timeout": float,
+    "command_timeout": float,
+    "statement_cache_size": int,
+    "prepared_statement_cache_size": int,
+    "max_cached_statement_lifetime": int,
+    "max_cacheable_statement_size": int,
+}
+
+
+def _asyncpg_connect_args(query) -> dict:
+    """Traduce la query de una URL libpq a argumentos tipados de ``asyncpg.connect``."""
+    connect_args = {}
+    for key, value in query.items():
+        key = _LIBPQ_TO_ASYNCPG.get(key, key)
+        if key in _ASYNCPG_OPTION_TYPES and isinstance(value, str):
+            connect_args[key] = _ASYNCPG_OPTION_TYPES[key](value)
+    return connect_args
+
+
+@lru_cache(maxsize=None)
+def _create_async_engine(url: str):
+    parsed = make_url(url)
+    parsed = parsed.set(drivername=_ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername))
+    if parsed.get_backend_name() == "sqlite":
+        # Abrir un fichero SQLite es barato; sin pool no se comparten conexiones entre bucles
+        return create_async_engine(parsed, poolclass=NullPool, query_cache_size=1200)
+    # La URL es la de psycopg2: su query no se pasa tal cual a ``asyncpg.connect``
+    connect_args = _asyncpg_connect_args(parsed.query) if parsed.get_backend_name() == "postgresql" else {}
+    return create_async_engine(
+        parsed.set(query={}),
+        connect_args=connect_args,
+        pool_pre_ping=True,
+        pool_size=int(os.getenv("DB_POOL_SIZE", "20")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "40")),
+        pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        pool_timeout=int(os.getenv("DB_POOL_TIMEOUT", "5")),
+        query_cache_size=1200,
+    )
+
+
+@lru_cache(maxsize=8)
+def _async_session_factory(engine) -> async_sessionmaker:
+    return async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+
+def get_async_session(engine=None) -> AsyncSession:
+    """Devuelve una ``AsyncSession``; usar como ``async with get_async_session():``."""
+    if engine is None:
+        engine = get_async_engine()
+    return _async_session_factory(engine)()
+
+
+def _fetch_sync(stmt, fetch: Callable[[Result], Any]) -> Any:
+    session = get_session()
+    try:
+        return fetch(session.execute(stmt))
+    finally:
+        session.close()
+
+
+async def _fetch_async(stmt, fetch: Callable[[Result], Any], engine=None) -> Any:
+    """Ejecuta ``stmt`` sin bloquear el bucle de eventos y aplica ``fetch`` al resultado.
+
+    Una SQLite en memoria privada (``sqlite://``, ``:memory:``) no es visible
+    desde otra conexión, así que la consulta se ejecuta en un hilo sobre la
+    conexión única del motor síncrono.
+    """
+    if engine is None and _is_private_sqlite_memory(_database_url()):
+        return await asyncio.to_thread(_fetch_sync, stmt, fetch)
+    async with get_async_session(engine) as session:
+        return fetch(await session.execute(stmt))
+
+
+def _all_scalars(result: Result) -> list:
+    return list(result.scalars())
+
+
+async def get_user_async(username: str, engine=None) -> Optional[User]:
+    """Versión asíncrona de ``get_user``."""
+    return await _fetch_async(select(User).where(User.username == username), Result.scalar, engine)
+
+
+async def get_device_async(device_id: str, engine=None) -> Optional[Device]:
+    """Versión asíncrona de ``get_device``."""
+    return await _fetch_async(select(Device).where(Device.id == device_id), Result.scalar, engine)
+
+
+async def get_device_by_token_async(token: str, engine=None) -> Optional[Device]:
+    """Versión asíncrona de ``get_device_by_token``."""
+    return await _fetch_async(select(Device).where(Device.token == token), Result.scalar, engine)
+
+
+async def get_latest_position_async(device_id: str, engine=None) -> Optional[Position]:
+    """Versión asíncrona de ``get_latest_position``."""
+    stmt = (
+        select(Position)
+        .where(Position.device_id == device_id)
+        .order_by(Position.timestamp.desc())
+        .limit(1)
+    )
+    return await _fetch_async(stmt, Result.scalar, engine)
+
+
+async def get_all_positions_async(device_id: str, limit: int = 1000, engine=None) -> list[Position]:
+    """Versión asíncrona de ``get_all_positions``."""
+    stmt = (
+        select(Position)
+        .where(Position.device_id == device_id)
+        .order_by(Position.timestamp.desc())
+        .limit(limit)
+    )
+    return await _fetch_async(stmt, _all_scalars, engine)
+
+
+async def get_position_coordinates_async(
+    device_id: str, limit: int = 1000, engine=None
+) -> list[tuple[float, float]]:
+    """Versión asíncrona de ``get_position_coordinates``."""
+    stmt = (
+        select(Position.latitude, Position.longitude)
+        .where(Position.device_id == device_id)
+        .order_by(Position.timestamp.desc())
+        .limit(limit)
+    )
+    return await _fetch_async(stmt, Result.all, engine)
 
 
 # Consultas y mutaciones sobre posiciones y dispositivos
@@ -233,6 +486,23 @@ def save_position(
         session.close()
 
 
+def save_positions_bulk(rows: list[dict], engine=None) -> None:
+    """Guarda un lote de posiciones en una única transacción.
+
+    Cada elemento de ``rows`` es un diccionario con las columnas de
+    ``Position``. Se omite la unidad de trabajo del ORM, por lo que no se
+    devuelven instancias ni se refrescan identificadores.
+    """
+    if not rows:
+        return
+    session = get_session(engine)
+    try:
+        session.bulk_insert_mappings(Position, rows)
+        session.commit()
+    finally:
+        session.close()
+
+
 def get_latest_position(device_id: str, engine=None) -> Optional[Position]:
     """Obtiene la última posición registrada de un dispositivo."""
     session = get_session(engine)
@@ -262,6 +532,28 @@ def get_all_positions(device_id: str, limit: int = 1000, engine=None) -> list[Po
         session.close()
 
 
+def get_position_coordinates(
+    device_id: str, limit: int = 1000, engine=None
+) -> list[tuple[float, float]]:
+    """Obtiene solo ``(latitud, longitud)`` del historial de un dispositivo.
+
+    Usa un SELECT de columnas en lugar de cargar objetos ``Position``, lo
+    que evita la hidratación del ORM cuando solo se necesitan coordenadas
+    (p.ej. para generar GeoJSON).
+    """
+    session = get_session(engine)
+    try:
+        stmt = (
+            select(Position.latitude, Position.longitude)
+            .where(Position.device_id == device_id)
+            .order_by(Position.timestamp.desc())
+            .limit(limit)
+        )
+        return session.execute(stmt).all()
+    finally:
+        session.close()
+
+
 def get_positions_in_range(
     device_id: str, start: datetime, end: datetime, engine=None
 ) -> list[Position]:
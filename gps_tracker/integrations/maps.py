@@ -11,6 +11,9 @@ import os
 from dataclasses import dataclass
 from typing import Any
 
+import msgspec
+import orjson
+
 try:  # pragma: no cover - fallback para entornos sin dependencias opcionales
     import httpx
 except ImportError:  # pragma: no cover - ejecución offline
@@ -20,6 +23,33 @@ except ImportError:  # pragma: no cover - ejecución offline
 MAPBOX_STYLE = os.getenv("MAPBOX_STYLE", "streets-v12")
 
 
+def _json_body(response: Any) -> Any:
+    """Decodifica la respuesta con ``orjson``."""
+
+    return orjson.loads(response.content)
+
+
+class _RouteGeometry(msgspec.Struct):
+    coordinates: list[list[float]] = []
+
+
+class _RouteLegPayload(msgspec.Struct):
+    distance: float = 0.0
+    duration: float = 0.0
+    geometry: _RouteGeometry = msgspec.field(default_factory=_RouteGeometry)
+
+
+class _RoutePayload(msgspec.Struct):
+    legs: list[_RouteLegPayload] = []
+
+
+class _RouteResponse(msgspec.Struct):
+    routes: list[_RoutePayload] = msgspec.field(default_factory=lambda: [_RoutePayload()])
+
+
+_ROUTE_DECODER = msgspec.json.Decoder(_RouteResponse)
+
+
 @dataclass
 class RouteLeg:
     """Segmento de una ruta calculada."""
@@ -39,13 +69,40 @@ class ReverseGeocodeResult:
     provider: str
 
 
+def _route_legs(response: Any) -> list[RouteLeg]:
+    """Convierte una respuesta Directions/OSRM en segmentos ``RouteLeg``.
+
+    El JSON se decodifica con ``msgspec`` directamente a estructuras tipadas
+    en una sola pasada.
+    """
+
+    payload = _ROUTE_DECODER.decode(response.content)
+    return [
+        RouteLeg(
+            distance_km=leg.distance / 1000,
+            duration_minutes=leg.duration / 60,
+            geometry=[(coord[1], coord[0]) for coord in leg.geometry.coordinates],
+        )
+        for leg in payload.routes[0].legs
+    ]
+
+
 class MapProvider:
     """Interfaz de proveedores de mapas."""
 
     name = "base"
 
-    def tile_url(self, z: int, x: int, y: int) -> str:  # pragma: no cover - interface
-        raise NotImplementedError
+    # Plantilla ``str.format`` con ``{z}``, ``{x}`` e ``{y}``; la define cada proveedor
+    _tile_tpl: str
+
+    def tile_url(self, z: int, x: int, y: int) -> str:
+        return self._tile_tpl.format(z=z, x=x, y=y)
+
+    def tile_urls(self, tiles: list[tuple[int, int, int]]) -> list[str]:
+        """URLs para un lote de tiles ``(z, x, y)`` (p.ej. un viewport completo)."""
+
+        fmt = self._tile_tpl.format
+        return [fmt(z=z, x=x, y=y) for z, x, y in tiles]
 
     async def reverse_geocode(self, latitude: float, longitude: float) -> ReverseGeocodeResult:
         raise NotImplementedError
@@ -63,11 +120,9 @@ class MapboxProvider(MapProvider):
 
     def __init__(self, token: str) -> None:
         self.token = token
-
-    def tile_url(self, z: int, x: int, y: int) -> str:
-        return (
-            f"https://api.mapbox.com/styles/v1/mapbox/{MAPBOX_STYLE}/tiles/256/{z}/{x}/{y}"
-            f"?access_token={self.token}"
+        self._tile_tpl = (
+            f"https://api.mapbox.com/styles/v1/mapbox/{MAPBOX_STYLE}/tiles/256/{{z}}/{{x}}/{{y}}"
+            f"?access_token={token}"
         )
 
     async def reverse_geocode(self, latitude: float, longitude: float) -> ReverseGeocodeResult:
@@ -78,7 +133,7 @@ class MapboxProvider(MapProvider):
         async with httpx.AsyncClient(timeout=10) as client:
             response = await client.get(url, params=params)
             response.raise_for_status()
-            data = response.json()
+            data = _json_body(response)
         feature = data.get("features", [{}])[0]
         place = feature.get("place_name", "Desconocido")
         coords = feature.get("center", [longitude, latitude])
@@ -101,18 +156,7 @@ class MapboxProvider(MapProvider):
         async with httpx.AsyncClient(timeout=10) as client:
             response = await client.get(url, params=params)
             response.raise_for_status()
-            payload = response.json()
-        legs = []
-        for leg in payload.get("routes", [{}])[0].get("legs", []):
-            geometry = [(coord[1], coord[0]) for coord in leg.get("geometry", {}).get("coordinates", [])]
-            legs.append(
-                RouteLeg(
-                    distance_km=leg.get("distance", 0.0) / 1000,
-                    duration_minutes=leg.get("duration", 0.0) / 60,
-                    geometry=geometry,
-                )
-            )
-        return legs
+            return _route_legs(response)
 
 
 class OsmProvider(MapProvider):
@@ -120,8 +164,7 @@ class OsmProvider(MapProvider):
 
     name = "osm"
 
-    def tile_url(self, z: int, x: int, y: int) -> str:
-        return f"https://tile.openstreetmap.org/{z}/{x}/{y}.png"
+    _tile_tpl = "https://tile.openstreetmap.org/{z}/{x}/{y}.png"
 
     async def reverse_geocode(self, latitude: float, longitude: float) -> ReverseGeocodeResult:
         if httpx is None:
@@ -132,7 +175,7 @@ class OsmProvider(MapProvider):
         async with httpx.AsyncClient(timeout=10, headers=headers) as client:
             response = await client.get(url, params=params)
             response.raise_for_status()
-            data = response.json()
+            data = _json_body(response)
         return ReverseGeocodeResult(
             label=data.get("display_name", "Desconocido"),
             longitude=float(data.get("lon", longitude)),
@@ -152,18 +195,7 @@ class OsmProvider(MapProvider):
         async with httpx.AsyncClient(timeout=10) as client:
             response = await client.get(url, params=params)
             response.raise_for_status()
-            payload = response.json()
-        legs: list[RouteLeg] = []
-        for leg in payload.get("routes", [{}])[0].get("legs", []):
-            geometry = [(coord[1], coord[0]) for coord in leg.get("geometry", {}).get("coordinates", [])]
-            legs.append(
-                RouteLeg(
-                    distance_km=leg.get("distance", 0.0) / 1000,
-                    duration_minutes=leg.get("duration", 0.0) / 60,
-                    geometry=geometry,
-                )
-            )
-        return legs
+            return _route_legs(response)
 
 
 class MockMapProvider(MapProvider):
@@ -171,8 +203,7 @@ class MockMapProvider(MapProvider):
 
     name = "mock"
 
-    def tile_url(self, z: int, x: int, y: int) -> str:
-        return f"https://tiles.invalid/{z}/{x}/{y}.png"
+    _tile_tpl = "https://tiles.invalid/{z}/{x}/{y}.png"
 
     async def reverse_geocode(self, latitude: float, longitude: float) -> ReverseGeocodeResult:
         label = f"Mocked address ({latitude:.4f},{longitude:.4f})"
@@ -209,6 +240,9 @@ class MapService:
     def tile_url(self, z: int, x: int, y: int) -> str:
         return self.provider.tile_url(z, x, y)
 
+    def tile_urls(self, tiles: list[tuple[int, int, int]]) -> list[str]:
+        return self.provider.tile_urls(tiles)
+
     async def reverse_geocode(self, latitude: float, longitude: float) -> ReverseGeocodeResult:
         try:
             return await self.provider.reverse_geocode(latitude, longitude)
@@ -9,76 +9,158 @@ con SES/Twilio/FCM/APNs.
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
 import os
+from collections import deque
 from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Any, Callable
 
-import redis
+import orjson
+from redis import asyncio as aioredis
 
 
 logger = logging.getLogger(__name__)
 
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "32"))
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", "5"))
+
+
+@lru_cache(maxsize=8)
+def get_redis_pool(url: str) -> aioredis.BlockingConnectionPool:
+    """Pool de conexiones compartido por URL entre colas y demás integraciones.
+
+    Al agotar el pool se espera hasta ``REDIS_POOL_TIMEOUT`` segundos por una
+    conexión libre en lugar de fallar de inmediato.
+    """
+
+    return aioredis.BlockingConnectionPool.from_url(
+        url, max_connections=REDIS_MAX_CONNECTIONS, timeout=REDIS_POOL_TIMEOUT
+    )
+
 
 @dataclass
 class NotificationMessage:
-    """Mensaje genérico a enviar por un canal específico."""
+    """Mensaje genérico a enviar por un canal específico.
+
+    La serialización se cachea en la instancia: un mensaje leído de la cola
+    se puede reencolar sin volver a generar su JSON. Los mensajes se tratan
+    como inmutables una vez serializados.
+    """
 
     channel: str
     recipient: str
     subject: str | None = None
     body: str | None = None
     metadata: dict[str, Any] = field(default_factory=dict)
+    _cached_json: str | None = field(default=None, init=False, repr=False, compare=False)
 
     def to_json(self) -> str:
-        return json.dumps({
-            "channel": self.channel,
-            "recipient": self.recipient,
-            "subject": self.subject,
-            "body": self.body,
-            "metadata": self.metadata,
-        })
+        if self._cached_json is None:
+            self._cached_json = orjson.dumps({
+                "channel": self.channel,
+                "recipient": self.recipient,
+                "subject": self.subject,
+                "body": self.body,
+                "metadata": self.metadata,
+            }).decode()
+        return self._cached_json
 
     @classmethod
     def from_json(cls, raw: str) -> "NotificationMessage":
-        data = json.loads(raw)
-        return cls(
+        data = orjson.loads(raw)
+        message = cls(
             channel=data["channel"],
             recipient=data["recipient"],
             subject=data.get("subject"),
             body=data.get("body"),
             metadata=data.get("metadata", {}),
         )
+        message._cached_json = raw
+        return message
 
 
 class NotificationQueue:
-    """Cola basada en Redis con fallback en memoria."""
+    """Cola basada en Redis con fallback en memoria.
+
+    El fallback en memoria es un ``deque`` más un ``asyncio.Event`` que avisa
+    de que hay mensajes: hay un único consumidor en el mismo bucle de
+    eventos, así que no hace falta la maquinaria de futures de ``asyncio.Queue``.
+    """
 
     def __init__(self, redis_url: str | None = None) -> None:
         self.redis_url = redis_url or os.getenv("REDIS_URL")
-        self._client = redis.from_url(self.redis_url) if self.redis_url else None
-        self._memory_queue: asyncio.Queue[str] = asyncio.Queue()
+        self._client = (
+            aioredis.Redis(connection_pool=get_redis_pool(self.redis_url)) if self.redis_url else None
+        )
+        self._buffer: deque[str] = deque()
+        self._not_empty = asyncio.Event()
         self.key = "notifications:pending"
 
     async def enqueue(self, message: NotificationMessage) -> None:
         payload = message.to_json()
         if self._client:
-            self._client.rpush(self.key, payload)
+            await self._client.rpush(self.key, payload)
         else:
-            await self._memory_queue.put(payload)
+            self._buffer.append(payload)
+            self._not_empty.set()
+
+    async def enqueue_many(self, messages: list[NotificationMessage], batch_size: int = 100) -> None:
+        """Encola varios mensajes; en Redis viajan en un único pipeline."""
+
+        payloads = [message.to_json() for message in messages]
+        if self._client:
+            async with self._client.pipeline(transaction=False) as pipe:
+                for start in range(0, len(payloads), batch_size):
+                    pipe.rpush(self.key, *payloads[start:start + batch_size])
+                await pipe.execute()
+            return
+        self._buffer.extend(payloads)
+        if payloads:
+            self._not_empty.set()
+
+    async def dequeue_many(self, batch_size: int = 100) -> list[NotificationMessage]:
+        """Extrae hasta ``batch_size`` mensajes sin esperar (LRANGE+LTRIM en Redis)."""
+
+        if batch_size <= 0:
+            return []
+        if self._client:
+            async with self._client.pipeline(transaction=True) as pipe:
+                pipe.lrange(self.key, 0, batch_size - 1)
+                pipe.ltrim(self.key, batch_size, -1)
+                raw_items, _ = await pipe.execute()
+            return [NotificationMessage.from_json(raw.decode()) for raw in raw_items]
+        popleft = self._buffer.popleft
+        count = min(batch_size, len(self._buffer))
+        return [NotificationMessage.from_json(popleft()) for _ in range(count)]
+
+    async def dequeue_blocking(self) -> NotificationMessage:
+        """Espera hasta que haya un mensaje disponible y lo devuelve."""
+
+        if not self._client:
+            await self._wait_for_messages()
+            return NotificationMessage.from_json(self._buffer.popleft())
+        while True:
+            message = await self.dequeue(timeout=5)
+            if message:
+                return message
 
     async def dequeue(self, timeout: int = 1) -> NotificationMessage | None:
         if self._client:
-            raw = self._client.blpop(self.key, timeout=timeout)
+            raw = await self._client.blpop(self.key, timeout=timeout)
             if raw:
                 return NotificationMessage.from_json(raw[1].decode())
             return None
         try:
-            raw = await asyncio.wait_for(self._memory_queue.get(), timeout=timeout)
+            await asyncio.wait_for(self._wait_for_messages(), timeout=timeout)
         except asyncio.TimeoutError:
             return None
-        return NotificationMessage.from_json(raw)
+        return NotificationMessage.from_json(self._buffer.popleft())
+
+    async def _wait_for_messages(self) -> None:
+        while not self._buffer:
+            self._not_empty.clear()
+            await self._not_empty.wait()
 
 
 class EmailProvider:
@@ -131,18 +213,25 @@ class NotificationDispatcher:
         }
 
     async def dispatch(self, message: NotificationMessage) -> dict[str, Any]:
-        handler = self._routes.get(message.channel)
-        if not handler:
-            raise ValueError(f"Canal no soportado: {message.channel}")
-        return await handler(message)
+        # ``_routes`` queda para introspección; el despacho evita el lookup y el bound method
+        match message.channel:
+            case "email":
+                return await self.email_provider.send(message)
+            case "sms":
+                return await self.sms_provider.send(message)
+            case "push":
+                return await self.push_provider.send(message)
+            case _:
+                raise ValueError(f"Canal no soportado: {message.channel}")
 
 
 class NotificationService:
     """Fachada que junta cola y dispatcher con un worker asíncrono."""
 
-    def __init__(self, queue: NotificationQueue, dispatcher: NotificationDispatcher) -> None:
+    def __init__(self, queue: NotificationQueue, dispatcher: NotificationDispatcher, batch_size: int = 64) -> None:
         self.queue = queue
         self.dispatcher = dispatcher
+        self.batch_size = batch_size
         self._worker_task: asyncio.Task | None = None
 
     @classmethod
@@ -158,15 +247,20 @@ class NotificationService:
 
     async def _worker_loop(self) -> None:
         while True:
-            message = await self.queue.dequeue(timeout=1)
-            if not message:
-                await asyncio.sleep(0.1)
-                continue
-            try:
-                await self.dispatcher.dispatch(message)
-            except Exception as exc:  # pragma: no cover - logging de fallas externas
-                logger.error("No se pudo despachar notificación: %s", exc)
+            # Se espera al primer mensaje y se drena el resto del lote sin bloquear
+            first = await self.queue.dequeue_blocking()
+            messages = [first, *await self.queue.dequeue_many(self.batch_size - 1)]
+            results = await asyncio.gather(
+                *(self.dispatcher.dispatch(message) for message in messages),
+                return_exceptions=True,
+            )
+            for result in results:
+                if isinstance(result, Exception):  # pragma: no cover - logging de fallas externas
+                    logger.error("No se pudo despachar notificación: %s", result)
 
     async def enqueue(self, message: NotificationMessage) -> None:
         await self.queue.enqueue(message)
 
+    async def enqueue_many(self, messages: list[NotificationMessage]) -> None:
+        await self.queue.enqueue_many(messages)
+
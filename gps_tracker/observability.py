@@ -2,6 +2,7 @@ import importlib
 import importlib.util
 import os
 import time
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
@@ -51,6 +52,56 @@ DEVICE_ONLINE = Gauge(
 )
 
 
+# Los hijos etiquetados se memorizan para no pasar por ``labels()`` en cada
+# evento; el LRU acota la memoria si crece el número de dispositivos/rutas.
+_LABEL_CACHE_SIZE = int(os.getenv("METRICS_LABEL_CACHE_SIZE", "10000"))
+
+
+# Plantilla de ruta por objeto ``Route``; las rutas viven lo mismo que la app.
+_route_paths: dict[int, str] = {}
+
+
+@lru_cache(maxsize=_LABEL_CACHE_SIZE)
+def _device_children(device_id: str) -> tuple[Any, Any, Any]:
+    return (
+        INGESTION_COUNTER.labels(device_id=device_id),
+        DEVICE_LAST_SEEN.labels(device_id=device_id),
+        _device_online_child(device_id),
+    )
+
+
+@lru_cache(maxsize=_LABEL_CACHE_SIZE)
+def _device_online_child(device_id: str) -> Any:
+    return DEVICE_ONLINE.labels(device_id=device_id)
+
+
+@lru_cache(maxsize=_LABEL_CACHE_SIZE)
+def _alert_delivery_child(channel: str, status: str) -> Any:
+    return ALERT_DELIVERY_COUNTER.labels(channel=channel, status=status)
+
+
+@lru_cache(maxsize=_LABEL_CACHE_SIZE)
+def _latency_child(method: str, path: str, status_code: int) -> Any:
+    return API_LATENCY.labels(method=method, path=path, status_code=str(status_code))
+
+
+@lru_cache(maxsize=1)
+def _otel_modules() -> tuple[Any, ...] | None:
+    """Importa una sola vez los módulos de OpenTelemetry (``None`` si faltan)."""
+
+    try:
+        from opentelemetry import trace
+        from opentelemetry.exporter.otlp.proto.http import trace_exporter
+        from opentelemetry.instrumentation import fastapi as fastapi_inst
+        from opentelemetry.instrumentation import requests as requests_inst
+        from opentelemetry.sdk import resources
+        from opentelemetry.sdk import trace as sdk_trace
+        from opentelemetry.sdk.trace import export as sdk_export
+    except ImportError:
+        return None
+    return (trace, trace_exporter, resources, sdk_trace, sdk_export, requests_inst, fastapi_inst)
+
+
 class Observability:
     """Configura tracing, métricas personalizadas y perfiles opcionales."""
 
@@ -67,18 +118,18 @@ class Observability:
         if not endpoint:
             return
 
-        if importlib.util.find_spec("opentelemetry.sdk.trace") is None:
+        modules = _otel_modules()
+        if modules is None:
             return
-
-        trace_mod = importlib.import_module("opentelemetry.trace")
-        exporter_mod = importlib.import_module(
-            "opentelemetry.exporter.otlp.proto.http.trace_exporter"
-        )
-        resources_mod = importlib.import_module("opentelemetry.sdk.resources")
-        sdk_trace = importlib.import_module("opentelemetry.sdk.trace")
-        sdk_export = importlib.import_module("opentelemetry.sdk.trace.export")
-        requests_inst = importlib.import_module("opentelemetry.instrumentation.requests")
-        fastapi_inst = importlib.import_module("opentelemetry.instrumentation.fastapi")
+        (
+            trace_mod,
+            exporter_mod,
+            resources_mod,
+            sdk_trace,
+            sdk_export,
+            requests_inst,
+            fastapi_inst,
+        ) = modules
 
         resource = resources_mod.Resource.create(
             {
@@ -112,16 +163,18 @@ class Observability:
             response = await call_next(request)
             elapsed = time.perf_counter() - start
 
-            route_template = request.url.path
+            route_template = None
             route = request.scope.get("route")
-            if route and getattr(route, "path", None):
-                route_template = route.path
-
-            API_LATENCY.labels(
-                method=request.method,
-                path=route_template,
-                status_code=str(response.status_code),
-            ).observe(elapsed)
+            if route is not None:
+                route_template = _route_paths.get(id(route))
+                if route_template is None:
+                    route_template = getattr(route, "path", None)
+                    if route_template:
+                        _route_paths[id(route)] = route_template
+            if not route_template:
+                route_template = request.url.path
+
+            _latency_child(request.method, route_template, response.status_code).observe(elapsed)
             return response
 
     def _maybe_enable_profiler(self) -> None:
@@ -151,21 +204,22 @@ class Observability:
         return self.output_path
 
 
-def record_ingestion(device_id: str) -> None:
-    """Incrementa las métricas de ingestión y latencia de heartbeat."""
+def record_ingestion(device_id: str, count: int = 1) -> None:
+    """Incrementa las métricas de ingestión (``count`` posiciones) y latencia de heartbeat."""
 
-    INGESTION_COUNTER.labels(device_id=device_id).inc()
-    DEVICE_LAST_SEEN.labels(device_id=device_id).set_to_current_time()
-    DEVICE_ONLINE.labels(device_id=device_id).set(1)
+    ingestions, last_seen, online = _device_children(device_id)
+    ingestions.inc(count)
+    last_seen.set_to_current_time()
+    online.set(1)
 
 
 def record_alert_delivery(channel: str, status: str = "delivered") -> None:
     """Cuenta entregas de alertas por canal (email/webhook/push)."""
 
-    ALERT_DELIVERY_COUNTER.labels(channel=channel, status=status).inc()
+    _alert_delivery_child(channel, status).inc()
 
 
 def mark_device_offline(device_id: str) -> None:
     """Permite marcar dispositivos como offline en sondeos externos."""
 
-    DEVICE_ONLINE.labels(device_id=device_id).set(0)
+    _device_online_child(device_id).set(0)
@@ -3,14 +3,18 @@
 from __future__ import annotations
 
 import hmac
-import json
 import os
 from dataclasses import dataclass
 from hashlib import sha256
 from typing import Any
 
+import orjson
+
 
 PAYMENT_WEBHOOK_SECRET = os.getenv("PAYMENT_WEBHOOK_SECRET", "change-me")
+_SIGNATURE_HEX_LENGTH = sha256().digest_size * 2
+# HMAC con la clave ya preparada; cada firma trabaja sobre una copia
+_WEBHOOK_HMAC = hmac.new(PAYMENT_WEBHOOK_SECRET.encode(), digestmod=sha256)
 
 
 @dataclass
@@ -73,19 +77,32 @@ class PaymentGateway:
     def create_checkout(self, amount: int, currency: str, description: str) -> PaymentSession:
         return self.provider.create_session(amount, currency, description)
 
+    @staticmethod
+    def _webhook_mac(payload: bytes) -> "hmac.HMAC":
+        mac = _WEBHOOK_HMAC.copy()
+        mac.update(payload)
+        return mac
+
     @staticmethod
     def sign_payload(payload: bytes) -> str:
-        return hmac.new(PAYMENT_WEBHOOK_SECRET.encode(), payload, sha256).hexdigest()
+        return PaymentGateway._webhook_mac(payload).hexdigest()
 
     @staticmethod
     def verify_signature(signature: str, payload: bytes) -> bool:
-        expected = PaymentGateway.sign_payload(payload)
-        return hmac.compare_digest(signature, expected)
+        # Firmas con longitud o formato inválidos se rechazan sin calcular el HMAC
+        if len(signature) != _SIGNATURE_HEX_LENGTH:
+            return False
+        try:
+            provided = bytes.fromhex(signature)
+        except ValueError:
+            return False
+        expected = PaymentGateway._webhook_mac(payload).digest()
+        return hmac.compare_digest(provided, expected)
 
     @staticmethod
     def parse_event(payload: bytes) -> dict[str, Any]:
         try:
-            return json.loads(payload.decode())
-        except json.JSONDecodeError:
+            return orjson.loads(payload)
+        except orjson.JSONDecodeError:
             return {"raw": payload.decode(errors="ignore")}
 
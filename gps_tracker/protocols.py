@@ -3,11 +3,15 @@
 from __future__ import annotations
 
 import base64
-import json
-from dataclasses import dataclass
+import re
+import struct
+from array import array
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any
 
+import orjson
+
 
 @dataclass
 class DecodedPosition:
@@ -41,7 +45,7 @@ class TeltonikaAdapter(ProtocolAdapter):
 
     def decode_message(self, payload: bytes) -> DecodedPosition:
         try:
-            decoded = json.loads(payload.decode())
+            decoded = orjson.loads(payload)
         except Exception:
             decoded = {"id": "unknown", "lat": 0, "lon": 0}
         return DecodedPosition(
@@ -64,7 +68,11 @@ class TeltonikaAdapter(ProtocolAdapter):
             "event": position.event_type,
             "ts": (position.timestamp or datetime.utcnow()).isoformat(),
         }
-        return json.dumps(body).encode()
+        return orjson.dumps(body)
+
+
+# Campos 1 (dispositivo), 7-8 (lat/lon) y 11-12 (velocidad/rumbo) de una trama completa
+_QUECLINK_RE = re.compile(rb"^[^,]*,([^,]*),(?:[^,]*,){5}([^,]*),([^,]*),(?:[^,]*,){2}([^,]*),([^,]*)")
 
 
 class QueclinkAdapter(ProtocolAdapter):
@@ -73,6 +81,19 @@ class QueclinkAdapter(ProtocolAdapter):
     name = "queclink"
 
     def decode_message(self, payload: bytes) -> DecodedPosition:
+        # Solo tramas ASCII: con otros bytes ``float`` debe ver el texto ya limpiado por ``decode``
+        match = _QUECLINK_RE.match(payload) if payload.isascii() else None
+        if match:
+            device_id, latitude, longitude, speed, course = match.groups()
+            return DecodedPosition(
+                device_id=device_id.decode(errors="ignore"),
+                latitude=float(latitude),
+                longitude=float(longitude),
+                speed=float(speed),
+                course=float(course),
+                event_type="queclink",
+            )
+        # Tramas incompletas: se conservan los valores por defecto campo a campo
         text = payload.decode(errors="ignore")
         parts = text.split(",")
         device_id = parts[1] if len(parts) > 1 else "unknown"
@@ -98,6 +119,10 @@ class QueclinkAdapter(ProtocolAdapter):
         return payload.encode()
 
 
+# Latitud y longitud en micro-grados, enteros con signo big-endian tras el id de 4 bytes
+_CONCOX_COORDS = struct.Struct(">ii")
+
+
 class ConcoxAdapter(ProtocolAdapter):
     """Soporte mínimo para tramas Concox en Base64."""
 
@@ -110,31 +135,95 @@ class ConcoxAdapter(ProtocolAdapter):
             decoded = payload
         if len(decoded) < 12:
             return DecodedPosition(device_id="unknown", latitude=0.0, longitude=0.0)
-        latitude = int.from_bytes(decoded[4:8], "big", signed=True) / 1000000
-        longitude = int.from_bytes(decoded[8:12], "big", signed=True) / 1000000
+        lat_raw, lon_raw = _CONCOX_COORDS.unpack_from(decoded, 4)
+        latitude = lat_raw / 1000000
+        longitude = lon_raw / 1000000
         device_id = decoded[:4].hex()
         return DecodedPosition(device_id=device_id, latitude=latitude, longitude=longitude, event_type="concox")
 
     def simulate_payload(self, position: DecodedPosition) -> bytes:
         device_bytes = bytes.fromhex(position.device_id.zfill(8))[:4]
-        lat_bytes = int(position.latitude * 1000000).to_bytes(4, "big", signed=True)
-        lon_bytes = int(position.longitude * 1000000).to_bytes(4, "big", signed=True)
-        return base64.b64encode(device_bytes + lat_bytes + lon_bytes)
+        coords = _CONCOX_COORDS.pack(int(position.latitude * 1000000), int(position.longitude * 1000000))
+        return base64.b64encode(device_bytes + coords)
+
+
+# Los adaptadores no guardan estado, así que se comparte una instancia de cada uno.
+_ADAPTERS: dict[str, ProtocolAdapter] = {
+    adapter.name: adapter for adapter in (TeltonikaAdapter(), QueclinkAdapter(), ConcoxAdapter())
+}
 
 
 def get_adapter(protocol: str) -> ProtocolAdapter:
-    name = protocol.lower()
-    adapters: dict[str, ProtocolAdapter] = {
-        "teltonika": TeltonikaAdapter(),
-        "queclink": QueclinkAdapter(),
-        "concox": ConcoxAdapter(),
-    }
-    if name not in adapters:
+    adapter = _ADAPTERS.get(protocol.lower())
+    if adapter is None:
         raise ValueError(f"Protocolo no soportado: {protocol}")
-    return adapters[name]
+    return adapter
 
 
 def decode_with(protocol: str, payload: bytes) -> DecodedPosition:
     adapter = get_adapter(protocol)
     return adapter.decode_message(payload)
 
+
+# Trama Concox completa: id de 4 bytes + latitud/longitud (16 caracteres en Base64, sin relleno)
+_CONCOX_FRAME = struct.Struct(">4sii")
+_CONCOX_B64_LEN = 16
+
+
+@dataclass
+class ConcoxBatch:
+    """Lote de tramas Concox decodificado por columnas.
+
+    Las coordenadas se guardan en ``array('d')`` contiguos, sin crear un
+    ``DecodedPosition`` por trama hasta que se necesite con ``positions()``.
+    ``event_types`` conserva el ``None`` que da ``ConcoxAdapter`` a las tramas cortas.
+    """
+
+    device_ids: list[str] = field(default_factory=list)
+    latitudes: array = field(default_factory=lambda: array("d"))
+    longitudes: array = field(default_factory=lambda: array("d"))
+    event_types: list[str | None] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.device_ids)
+
+    def positions(self) -> list[DecodedPosition]:
+        return [
+            DecodedPosition(device_id=device_id, latitude=lat, longitude=lon, event_type=event_type)
+            for device_id, lat, lon, event_type in zip(
+                self.device_ids, self.latitudes, self.longitudes, self.event_types
+            )
+        ]
+
+
+def decode_concox_batch(payloads: list[bytes]) -> ConcoxBatch:
+    """Decodifica muchas tramas Concox de una vez.
+
+    Si todas las tramas tienen el tamaño estándar, se decodifica el Base64
+    concatenado en una sola llamada y se recorre con ``struct.iter_unpack``.
+    En otro caso se decodifica trama a trama con ``ConcoxAdapter``.
+    """
+
+    batch = ConcoxBatch()
+    if all(len(payload) == _CONCOX_B64_LEN for payload in payloads):
+        try:
+            raw = base64.b64decode(b"".join(payloads), validate=True)
+        except ValueError:
+            raw = None
+        # Con relleno ``=`` en la última trama sobran o faltan bytes: se va trama a trama
+        if raw is not None and len(raw) == _CONCOX_FRAME.size * len(payloads):
+            for device_bytes, lat_raw, lon_raw in _CONCOX_FRAME.iter_unpack(raw):
+                batch.device_ids.append(device_bytes.hex())
+                batch.latitudes.append(lat_raw / 1000000)
+                batch.longitudes.append(lon_raw / 1000000)
+            batch.event_types.extend(["concox"] * len(payloads))
+            return batch
+
+    adapter = _ADAPTERS["concox"]
+    for payload in payloads:
+        position = adapter.decode_message(payload)
+        batch.device_ids.append(position.device_id)
+        batch.latitudes.append(position.latitude)
+        batch.longitudes.append(position.longitude)
+        batch.event_types.append(position.event_type)
+    return batch
@@ -9,6 +9,7 @@ import struct
 import time
 from dataclasses import dataclass
 from enum import StrEnum
+from functools import lru_cache
 from typing import Iterable, Optional
 
 
@@ -56,6 +57,11 @@ class KeyManager:
     def rotate_audit_key(self, new_key: str) -> None:
         self.audit_keys.insert(0, new_key)
 
+    def sign_audit(self, payload: str) -> str:
+        """Sign an audit payload with the active audit key."""
+
+        return sign_payload(self.active_audit_key, payload)
+
 
 # MFA helpers ---------------------------------------------------------------
 
@@ -70,19 +76,30 @@ def _time_counter(time_step: int = 30, for_time: Optional[int] = None) -> int:
     return int(epoch_time / time_step)
 
 
-def generate_totp(secret: str, digits: int = 6, time_step: int = 30, for_time: Optional[int] = None) -> str:
-    """Generate a TOTP code using only stdlib primitives."""
+_COUNTER = struct.Struct("!Q")
+_TRUNCATED = struct.Struct("!I")
 
-    key = base64.b32decode(secret, casefold=True)
-    counter = _time_counter(time_step=time_step, for_time=for_time)
-    msg = struct.pack("!Q", counter)
-    hmac_digest = hmac.new(key, msg, hashlib.sha1).digest()
+
+def _hotp(proto: "hmac.HMAC", counter: int, digits: int = 6) -> str:
+    """HOTP (RFC 4226) from a keyed HMAC-SHA1 prototype, which is left untouched."""
+
+    mac = proto.copy()
+    mac.update(_COUNTER.pack(counter))
+    hmac_digest = mac.digest()
     offset = hmac_digest[-1] & 0x0F
-    binary = struct.unpack("!I", hmac_digest[offset : offset + 4])[0] & 0x7FFFFFFF
+    binary = _TRUNCATED.unpack_from(hmac_digest, offset)[0] & 0x7FFFFFFF
     code = binary % (10**digits)
     return str(code).zfill(digits)
 
 
+def generate_totp(secret: str, digits: int = 6, time_step: int = 30, for_time: Optional[int] = None) -> str:
+    """Generate a TOTP code using only stdlib primitives."""
+
+    key = base64.b32decode(secret, casefold=True)
+    proto = hmac.new(key, b"", hashlib.sha1)
+    return _hotp(proto, _time_counter(time_step=time_step, for_time=for_time), digits)
+
+
 def verify_totp(secret: str, code: str, allowed_drift: int = 1) -> bool:
     """Validate a submitted code allowing small time drift."""
 
@@ -91,17 +108,28 @@ def verify_totp(secret: str, code: str, allowed_drift: int = 1) -> bool:
     except (TypeError, ValueError):
         return False
 
+    # The secret is decoded and keyed once; every counter in the drift window copies the prototype
+    key = base64.b32decode(secret, casefold=True)
+    proto = hmac.new(key, b"", hashlib.sha1)
+    base_counter = _time_counter()
     for delta in range(-allowed_drift, allowed_drift + 1):
-        expected = generate_totp(secret, for_time=int(time.time()) + delta * 30)
-        if hmac.compare_digest(expected, code):
+        if hmac.compare_digest(_hotp(proto, base_counter + delta), code):
             return True
     return False
 
 
 # Audit helpers -------------------------------------------------------------
 
+@lru_cache(maxsize=16)
+def _hmac_sha256(key: str) -> "hmac.HMAC":
+    # Prototype with the ipad/opad key schedule already applied; callers copy() it
+    return hmac.new(key.encode(), digestmod=hashlib.sha256)
+
+
 def sign_payload(key: str, payload: str) -> str:
-    return hmac.new(key.encode(), payload.encode(), hashlib.sha256).hexdigest()
+    mac = _hmac_sha256(key).copy()
+    mac.update(payload.encode())
+    return mac.hexdigest()
 
 
 def _load_keys(env_var: str, fallback: str) -> list[str]:
@@ -1,25 +1,65 @@
 """Cliente HTTP asíncrono liviano para sondas sintéticas.
 
-Este módulo evita dependencias externas (como ``httpx``) que no siempre
-están disponibles en entornos restringidos. Soporta dos modos:
+Soporta dos modos:
 
 * ``asgi://``: invoca directamente la aplicación FastAPI en memoria.
-* ``http(s)://``: usa la librería estándar ``urllib``.
+* ``http(s)://``: usa ``httpx.AsyncClient`` si está instalado y, si no,
+  ``http.client`` de la librería estándar en un hilo, reutilizando
+  conexiones keep-alive entre peticiones del mismo cliente.
+
+:class:`InProcessProbeClient` va un paso más allá del modo ``asgi://`` y
+llama directamente a los endpoints que usan las sondas.
 """
 
 from __future__ import annotations
 
 import asyncio
-import json
+import base64
+import http.client
 import ssl
 import time
 from dataclasses import dataclass
+from functools import cached_property, lru_cache
 from types import TracebackType
-from typing import Any, Callable, Mapping, MutableMapping
-from urllib import error, parse, request
+from typing import Any, Callable, Mapping, MutableMapping, Sequence
+from urllib import parse, request
+
+import msgspec
+import orjson
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from pydantic import ValidationError
 
+from gps_tracker.api import IngestPayload, health, ingest_http
 from gps_tracker.api import app as default_app
 
+try:  # pragma: no cover - cliente HTTP asíncrono nativo opcional
+    import httpx
+except ImportError:  # pragma: no cover - se usa ``http.client`` en un hilo
+    httpx = None
+
+
+@lru_cache(maxsize=256)
+def _enc_header(name: str, value: str) -> tuple[bytes, bytes]:
+    # Las sondas repiten casi siempre los mismos headers (región, token, content-type)
+    return name.lower().encode(), value.encode()
+
+
+_METHOD_CACHE = {"GET": "GET", "POST": "POST", "get": "GET", "post": "POST"}
+
+
+@lru_cache(maxsize=64)
+def _encode_path(path: str) -> bytes:
+    return path.encode()
+
+
+@lru_cache(maxsize=32)
+def _field_decoder(name: str) -> Any:
+    # Struct de un único campo: msgspec salta el resto del documento sin materializarlo.
+    # ``UNSET`` distingue una clave ausente de un ``null`` explícito.
+    field_struct = msgspec.defstruct("_Field", [("value", Any, msgspec.UNSET)], rename={"value": name})
+    return msgspec.json.Decoder(field_struct)
+
 
 class _Elapsed:
     def __init__(self, seconds: float) -> None:
@@ -29,16 +69,68 @@ class _Elapsed:
         return self._seconds
 
 
+# Errores de una conexión keep-alive que el servidor cerró antes de responder
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+_UNDECODED = object()
+
+_REDIRECT_STATUSES = frozenset({301, 302, 303, 307, 308})
+# Mismo límite de saltos que ``urllib.request.HTTPRedirectHandler``
+_MAX_REDIRECTS = 10
+
+
+def _proxy_for(scheme: str, host: str | None) -> parse.SplitResult | None:
+    """Proxy de ``HTTP_PROXY``/``HTTPS_PROXY`` para ``scheme`` salvo que ``NO_PROXY`` excluya ``host``."""
+
+    proxy = request.getproxies().get(scheme)
+    if not proxy or not host or request.proxy_bypass(host):
+        return None
+    return parse.urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+
+
+def _proxy_headers(proxy: parse.SplitResult | None) -> dict[str, str]:
+    if proxy is None or proxy.username is None:
+        return {}
+    credentials = f"{parse.unquote(proxy.username)}:{parse.unquote(proxy.password or '')}"
+    return {"Proxy-Authorization": f"Basic {base64.b64encode(credentials.encode()).decode()}"}
+
+
+def _send(
+    conn: http.client.HTTPConnection, method: str, target: str, headers: Mapping[str, str], body: bytes
+) -> tuple[http.client.HTTPResponse, bytes]:
+    conn.request(method, target, body=body or None, headers=headers)
+    resp = conn.getresponse()
+    return resp, resp.read()
+
+
 class ProbeResponse:
     def __init__(self, status_code: int, body: bytes, elapsed_seconds: float) -> None:
         self.status_code = status_code
         self._body = body
+        self._decoded: Any = _UNDECODED
         self.elapsed = _Elapsed(elapsed_seconds)
 
     def json(self) -> Any:
+        """Cuerpo decodificado; se decodifica una sola vez y se reutiliza."""
+
+        if self._decoded is _UNDECODED:
+            self._decoded = orjson.loads(self._body) if self._body else None
+        return self._decoded
+
+    def json_field(self, name: str, default: Any = None) -> Any:
+        """Devuelve una clave de primer nivel del cuerpo JSON sin decodificar el resto."""
+
         if not self._body:
-            return None
-        return json.loads(self._body.decode())
+            return default
+        if self._decoded is _UNDECODED:
+            try:
+                value = _field_decoder(name).decode(self._body).value
+            except msgspec.DecodeError:
+                pass  # no es un objeto o no es JSON: ``json()`` resuelve o lanza su propio error
+            else:
+                return default if value is msgspec.UNSET else value
+        data = self.json()
+        return data.get(name, default) if isinstance(data, dict) else default
 
     def raise_for_status(self) -> None:
         if 400 <= self.status_code:
@@ -52,7 +144,19 @@ class _AsgiConfig:
 
 
 class AsyncProbeClient:
-    """Cliente minimalista para GET/POST asíncronos."""
+    """Cliente minimalista para GET/POST asíncronos.
+
+    En modo HTTP, ``use_native=True`` (por defecto) usa ``httpx.AsyncClient``
+    sin pasar por el pool de hilos; sin ``httpx`` se recurre a ``http.client``.
+    """
+
+    # Claves constantes del scope ASGI; se copia por petición porque la app lo muta
+    _SCOPE_TEMPLATE: dict[str, Any] = {
+        "type": "http",
+        "http_version": "1.1",
+        "scheme": "https",
+        "query_string": b"",
+    }
 
     def __init__(
         self,
@@ -61,6 +165,7 @@ class AsyncProbeClient:
         timeout: int = 10,
         verify: bool = True,
         app=None,
+        use_native: bool = True,
     ) -> None:
         parsed = parse.urlparse(base_url)
         self._scheme = parsed.scheme or "http"
@@ -69,18 +174,38 @@ class AsyncProbeClient:
         self._verify = verify
         self._asgi: _AsgiConfig | None = None
         self._lifespan_cm = None
+        self._use_native = use_native and httpx is not None
+        self._session: Any = None
         if self._scheme == "asgi":
             base_path = parsed.path if parsed.path else ""
             if not base_path.startswith("/"):
                 base_path = f"/{base_path}" if base_path else ""
             self._asgi = _AsgiConfig(app=app or default_app, base_path=base_path)
-        self._ssl_context = None if verify else ssl._create_unverified_context()
+        base = parse.urlparse(self._base_url)
+        self._netloc = base.netloc
+        self._origin = f"{self._scheme}://{self._netloc}"
+        self._proxy = None if self._asgi else _proxy_for(self._scheme, base.hostname)
+        # Prefijo constante de las rutas HTTP: evita un ``urljoin`` por petición
+        self._url_prefix = self._request_target(self._scheme, self._netloc, f"{base.path}/", self._proxy)
+        self._idle_connections: list[http.client.HTTPConnection] = []
+
+    @cached_property
+    def _ssl_context(self) -> ssl.SSLContext | None:
+        # Solo se construye en modo HTTP(S), la primera vez que se necesita
+        return None if self._verify else ssl._create_unverified_context()
 
     async def __aenter__(self) -> "AsyncProbeClient":
         if self._asgi:
             lifespan = self._asgi.app.router.lifespan_context(self._asgi.app)
             self._lifespan_cm = lifespan
             await lifespan.__aenter__()
+        elif self._use_native:
+            self._session = httpx.AsyncClient(
+                base_url=self._base_url,
+                timeout=self._timeout,
+                verify=self._ssl_context or True,
+                follow_redirects=True,
+            )
         return self
 
     async def __aexit__(
@@ -91,6 +216,11 @@ class AsyncProbeClient:
     ) -> None:
         if self._lifespan_cm:
             await self._lifespan_cm.__aexit__(exc_type, exc, tb)
+        if self._session is not None:
+            await self._session.aclose()
+            self._session = None
+        while self._idle_connections:
+            self._idle_connections.pop().close()
 
     async def get(self, path: str, headers: Mapping[str, str] | None = None) -> ProbeResponse:
         return await self._request("GET", path, headers=headers)
@@ -99,7 +229,7 @@ class AsyncProbeClient:
         self,
         path: str,
         headers: Mapping[str, str] | None = None,
-        json_body: Mapping[str, Any] | None = None,
+        json_body: Mapping[str, Any] | Sequence[Mapping[str, Any]] | None = None,
     ) -> ProbeResponse:
         return await self._request("POST", path, headers=headers, json_body=json_body)
 
@@ -108,19 +238,34 @@ class AsyncProbeClient:
         method: str,
         path: str,
         headers: Mapping[str, str] | None = None,
-        json_body: Mapping[str, Any] | None = None,
+        json_body: Mapping[str, Any] | Sequence[Mapping[str, Any]] | None = None,
     ) -> ProbeResponse:
         headers = {k: v for k, v in (headers or {}).items()}
         body_bytes = b""
         if json_body is not None:
-            body_bytes = json.dumps(json_body).encode()
+            body_bytes = orjson.dumps(json_body)
             headers.setdefault("Content-Type", "application/json")
 
         if self._asgi:
             return await self._asgi_request(method, path, headers, body_bytes)
 
+        if self._session is not None:
+            return await self._http_request_native(method, path, headers, body_bytes)
+
         return await self._http_request(method, path, headers, body_bytes)
 
+    async def _http_request_native(
+        self,
+        method: str,
+        path: str,
+        headers: MutableMapping[str, str],
+        body_bytes: bytes,
+    ) -> ProbeResponse:
+        start = time.perf_counter()
+        resp = await self._session.request(method, path, headers=headers, content=body_bytes or None)
+        elapsed = time.perf_counter() - start
+        return ProbeResponse(resp.status_code, resp.content, elapsed)
+
     async def _http_request(
         self,
         method: str,
@@ -128,23 +273,111 @@ class AsyncProbeClient:
         headers: MutableMapping[str, str],
         body_bytes: bytes,
     ) -> ProbeResponse:
-        url = parse.urljoin(f"{self._base_url}/", path.lstrip("/"))
-        req = request.Request(url, headers=headers, method=method, data=body_bytes or None)
+        target = self._url_prefix + path.lstrip("/")
 
         def _call() -> ProbeResponse:
             start = time.perf_counter()
-            try:
-                with request.urlopen(req, context=self._ssl_context, timeout=self._timeout) as resp:
-                    body = resp.read()
-                    elapsed = time.perf_counter() - start
-                    return ProbeResponse(resp.status, body, elapsed)
-            except error.HTTPError as http_err:
-                body = http_err.read()
-                elapsed = time.perf_counter() - start
-                return ProbeResponse(http_err.code, body, elapsed)
+            resp, body = self._pooled_send(method, target, headers, body_bytes)
+            status, location = resp.status, resp.getheader("Location")
+            url, redirect_method, redirect_body = parse.urljoin(self._origin, target), method, body_bytes
+            # Redirecciones como ``urlopen``: 303, y 301/302 tras un POST, continúan con GET sin cuerpo
+            for _ in range(_MAX_REDIRECTS):
+                if status not in _REDIRECT_STATUSES or not location:
+                    break
+                url = parse.urljoin(url, location)
+                if parse.urlsplit(url).scheme not in ("http", "https"):
+                    break
+                if status == 303 or (status in (301, 302) and redirect_method == "POST"):
+                    redirect_method, redirect_body = "GET", b""
+                    headers.pop("Content-Type", None)
+                status, location, body = self._send_once(redirect_method, url, headers, redirect_body)
+            return ProbeResponse(status, body, time.perf_counter() - start)
 
         return await asyncio.to_thread(_call)
 
+    def _pooled_send(
+        self, method: str, target: str, headers: Mapping[str, str], body_bytes: bytes
+    ) -> tuple[http.client.HTTPResponse, bytes]:
+        """Envía la petición por una conexión keep-alive del pool hacia ``base_url``."""
+
+        headers = {**headers, **self._tunnel_free_proxy_headers}
+        conn, reused = self._acquire_connection()
+        try:
+            resp, body = _send(conn, method, target, headers, body_bytes)
+        except _STALE_CONNECTION_ERRORS:
+            conn.close()
+            if not reused:
+                raise
+            # El servidor cerró la conexión ociosa antes de responder: se reintenta una vez.
+            # Timeouts y demás errores no se reintentan (el POST de ingesta no es idempotente).
+            conn = self._new_connection()
+            try:
+                resp, body = _send(conn, method, target, headers, body_bytes)
+            except BaseException:
+                conn.close()
+                raise
+        except BaseException:
+            conn.close()
+            raise
+        if resp.will_close:
+            conn.close()
+        else:
+            self._idle_connections.append(conn)
+        return resp, body
+
+    def _send_once(
+        self, method: str, url: str, headers: Mapping[str, str], body_bytes: bytes
+    ) -> tuple[int, str | None, bytes]:
+        """Petición a una URL arbitraria (destino de una redirección) con una conexión propia."""
+
+        parts = parse.urlsplit(url)
+        proxy = _proxy_for(parts.scheme, parts.hostname)
+        target = self._request_target(parts.scheme, parts.netloc, parts.path or "/", proxy)
+        if parts.query:
+            target = f"{target}?{parts.query}"
+        if parts.scheme == "http":
+            headers = {**headers, **_proxy_headers(proxy)}
+        conn = self._connect(parts.scheme, parts.netloc, proxy)
+        try:
+            resp, body = _send(conn, method, target, headers, body_bytes)
+        finally:
+            conn.close()
+        return resp.status, resp.getheader("Location"), body
+
+    def _acquire_connection(self) -> tuple[http.client.HTTPConnection, bool]:
+        """Devuelve una conexión y si proviene del pool de conexiones ociosas."""
+
+        # ``list.pop``/``append`` son atómicos: las conexiones se comparten entre hilos de ``to_thread``
+        try:
+            return self._idle_connections.pop(), True
+        except IndexError:
+            return self._new_connection(), False
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        return self._connect(self._scheme, self._netloc, self._proxy)
+
+    @cached_property
+    def _tunnel_free_proxy_headers(self) -> dict[str, str]:
+        # Por HTTPS las credenciales del proxy viajan en el CONNECT del túnel
+        return _proxy_headers(self._proxy) if self._scheme == "http" else {}
+
+    @staticmethod
+    def _request_target(scheme: str, netloc: str, path: str, proxy: parse.SplitResult | None) -> str:
+        # Un proxy HTTP sin túnel espera la URL absoluta en la línea de petición
+        return f"http://{netloc}{path}" if proxy is not None and scheme == "http" else path
+
+    def _connect(
+        self, scheme: str, netloc: str, proxy: parse.SplitResult | None
+    ) -> http.client.HTTPConnection:
+        host = netloc if proxy is None else proxy.netloc.rpartition("@")[2]
+        if scheme == "https":
+            conn = http.client.HTTPSConnection(host, timeout=self._timeout, context=self._ssl_context)
+            if proxy is not None:
+                # CONNECT a través del proxy; TLS se negocia después con el destino
+                conn.set_tunnel(netloc, headers=_proxy_headers(proxy))
+            return conn
+        return http.client.HTTPConnection(host, timeout=self._timeout)
+
     async def _asgi_request(
         self,
         method: str,
@@ -158,19 +391,14 @@ class AsyncProbeClient:
         if not full_path.startswith("/"):
             full_path = "/" + full_path
 
-        scope = {
-            "type": "http",
-            "http_version": "1.1",
-            "method": method.upper(),
-            "path": full_path,
-            "raw_path": full_path.encode(),
-            "scheme": "https",
-            "query_string": b"",
-            "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
-        }
+        scope = self._SCOPE_TEMPLATE.copy()
+        scope["method"] = _METHOD_CACHE.get(method) or method.upper()
+        scope["path"] = full_path
+        scope["raw_path"] = _encode_path(full_path)
+        scope["headers"] = [_enc_header(k, v) for k, v in headers.items()]
 
         body_sent = False
-        response_body = bytearray()
+        response_chunks: list[bytes] = []
         status_code = 500
         start = time.perf_counter()
 
@@ -182,12 +410,72 @@ class AsyncProbeClient:
             return {"type": "http.request", "body": body_bytes, "more_body": False}
 
         async def send(message: dict) -> None:
-            nonlocal status_code, response_body
+            nonlocal status_code
             if message["type"] == "http.response.start":
                 status_code = message.get("status", 500)
             elif message["type"] == "http.response.body":
-                response_body.extend(message.get("body", b""))
+                response_chunks.append(message.get("body", b""))
 
         await self._asgi.app(scope, receive, send)
         elapsed = time.perf_counter() - start
-        return ProbeResponse(status_code, bytes(response_body), elapsed)
+        # Caso habitual: un único chunk, que se usa tal cual sin copiarlo
+        body = response_chunks[0] if len(response_chunks) == 1 else b"".join(response_chunks)
+        return ProbeResponse(status_code, body, elapsed)
+
+
+def _header(headers: Mapping[str, str], name: str) -> str | None:
+    lowered = name.lower()
+    for key, value in headers.items():
+        if key.lower() == lowered:
+            return value
+    return None
+
+
+async def _direct_health(headers: Mapping[str, str], json_body: Mapping[str, Any] | None) -> Any:
+    return await health()
+
+
+async def _direct_ingest_http(headers: Mapping[str, str], json_body: Mapping[str, Any] | None) -> Any:
+    token = _header(headers, "X-Device-Token")
+    if token is None:
+        raise HTTPException(status_code=422, detail="Falta el header X-Device-Token")
+    return await ingest_http(IngestPayload(**(json_body or {})), x_device_token=token)
+
+
+class InProcessProbeClient(AsyncProbeClient):
+    """Cliente ``asgi://`` que invoca directamente los endpoints de las sondas.
+
+    ``/health`` y ``/ingest/http`` se resuelven sin scope ASGI, router ni
+    parseo del body; el resto de rutas usa el modo ASGI normal. Al no pasar
+    por los middlewares, no registra latencias en las métricas de la API.
+    """
+
+    _DIRECT_ROUTES: dict[tuple[str, str], Callable] = {
+        ("GET", "/health"): _direct_health,
+        ("POST", "/ingest/http"): _direct_ingest_http,
+    }
+
+    def __init__(self, base_url: str = "asgi://local", **kwargs: Any) -> None:
+        super().__init__(base_url, **kwargs)
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        headers: Mapping[str, str] | None = None,
+        json_body: Mapping[str, Any] | Sequence[Mapping[str, Any]] | None = None,
+    ) -> ProbeResponse:
+        handler = self._DIRECT_ROUTES.get((method.upper(), path)) if self._asgi else None
+        if handler is None:
+            return await super()._request(method, path, headers=headers, json_body=json_body)
+
+        start = time.perf_counter()
+        status_code = 200
+        try:
+            result = await handler(headers or {}, json_body)
+        except HTTPException as exc:
+            status_code, result = exc.status_code, {"detail": exc.detail}
+        except ValidationError as exc:
+            status_code, result = 422, {"detail": exc.errors(include_url=False)}
+        body = orjson.dumps(jsonable_encoder(result))
+        return ProbeResponse(status_code, body, time.perf_counter() - start)
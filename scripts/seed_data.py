@@ -4,6 +4,7 @@ Crea tablas si no existen y añade un usuario de demo, un dispositivo y
 algunas posiciones para pruebas manuales.
 """
 
+import os
 from datetime import datetime, timedelta
 
 from gps_tracker.auth import get_password_hash
@@ -19,6 +20,25 @@ from gps_tracker.database import (
 )
 
 
+SEED_POSITIONS = int(os.getenv("SEED_POSITIONS", "5"))
+
+
+def _demo_rows(device_id: str, count: int, now: datetime) -> list[dict]:
+    """Genera las posiciones de demo, una cada 5 minutos hacia atrás desde ``now``."""
+
+    return [
+        {
+            "device_id": device_id,
+            "latitude": 40.4168 + idx * 0.0001,
+            "longitude": -3.7038 - idx * 0.0001,
+            "speed": 30 + idx,
+            "course": 90,
+            "timestamp": now - timedelta(minutes=5 * idx),
+        }
+        for idx in range(count)
+    ]
+
+
 def seed() -> None:
     engine = get_engine()
     init_db(engine=engine)
@@ -39,20 +59,12 @@ def seed() -> None:
             )
 
         if not session.query(Position).filter(Position.device_id == device.id).first():
-            now = datetime.utcnow()
-            for idx in range(5):
-                session.add(
-                    Position(
-                        device_id=device.id,
-                        latitude=40.4168 + idx * 0.0001,
-                        longitude=-3.7038 - idx * 0.0001,
-                        speed=30 + idx,
-                        course=90,
-                        timestamp=now - timedelta(minutes=idx * 5),
-                    )
-                )
-            session.commit()
-            print("Datos de demo insertados")
+            rows = _demo_rows(device.id, SEED_POSITIONS, datetime.utcnow())
+            if rows:
+                # Un único INSERT de Core con executemany, en una sola transacción
+                with engine.begin() as connection:
+                    connection.execute(Position.__table__.insert(), rows)
+            print(f"Datos de demo insertados ({len(rows)} posiciones)")
         else:
             print("Datos de demo ya existentes; no se insertan duplicados")
     finally:
@@ -16,7 +16,7 @@ import sys
 
 sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
 
-from gps_tracker.synthetic_client import AsyncProbeClient
+from gps_tracker.synthetic_client import AsyncProbeClient, InProcessProbeClient
 
 DEFAULT_REGIONS = ("us-east-1", "eu-west-1", "sa-east-1")
 
@@ -29,29 +29,49 @@ class ProbeResult:
     latency_ms: float
 
 
-async def probe_region(client: AsyncProbeClient, region: str, device_token: str | None) -> ProbeResult:
+async def _probe_health(client: AsyncProbeClient, headers: dict[str, str]) -> tuple[str, float]:
     try:
-        health_resp = await client.get("/health", headers={"X-Region": region})
+        health_resp = await client.get("/health", headers=headers)
         health_resp.raise_for_status()
-        health_status = health_resp.json().get("status", "unknown")
-        latency_ms = health_resp.elapsed.total_seconds() * 1000
+        return health_resp.json_field("status", "unknown"), health_resp.elapsed.total_seconds() * 1000
     except Exception as exc:  # pragma: no cover - cualquier fallo debe registrarse
-        return ProbeResult(region=region, health_status=f"error:{exc}", ingest_status="skipped", latency_ms=-1)
-
-    ingest_status = "skipped"
-
-    if device_token:
-        payload = {"latitude": 1.0, "longitude": 1.0, "speed": 10}
-        try:
-            ingest = await client.post(
-                "/ingest/http",
-                headers={"X-Device-Token": device_token, "X-Region": region},
-                json_body=payload,
-            )
-            ingest_status = f"{ingest.status_code}"
-        except Exception as exc:  # pragma: no cover - se reporta pero no se detiene el resto
-            ingest_status = f"error:{exc}"
-
+        return f"error:{exc}", -1
+
+
+async def _probe_ingest(
+    client: AsyncProbeClient,
+    headers: dict[str, str],
+    device_token: str | None,
+    samples: int = 1,
+) -> str:
+    if not device_token:
+        return "skipped"
+    payload = {"latitude": 1.0, "longitude": 1.0, "speed": 10}
+    # Varias muestras viajan en una sola petición al endpoint por lotes
+    path, body = ("/ingest/http/batch", [payload] * samples) if samples > 1 else ("/ingest/http", payload)
+    try:
+        ingest = await client.post(
+            path,
+            headers={**headers, "X-Device-Token": device_token},
+            json_body=body,
+        )
+        return f"{ingest.status_code}"
+    except Exception as exc:  # pragma: no cover - se reporta pero no se detiene el resto
+        return f"error:{exc}"
+
+
+async def probe_region(
+    client: AsyncProbeClient,
+    region: str,
+    device_token: str | None,
+    samples: int = 1,
+) -> ProbeResult:
+    region_headers = {"X-Region": region}
+    # Salud e ingesta son independientes: se lanzan a la vez sobre el mismo cliente
+    (health_status, latency_ms), ingest_status = await asyncio.gather(
+        _probe_health(client, region_headers),
+        _probe_ingest(client, region_headers, device_token, samples),
+    )
     return ProbeResult(
         region=region,
         health_status=health_status,
@@ -77,9 +97,21 @@ async def main(regions: Sequence[str], base_url: str) -> None:
     device_token = os.getenv("SYNTHETIC_DEVICE_TOKEN")
     timeout = int(os.getenv("SYNTHETIC_TIMEOUT", "10"))
     verify_tls = os.getenv("SYNTHETIC_VERIFY_TLS", "false").lower() == "true"
+    samples = int(os.getenv("SYNTHETIC_INGEST_SAMPLES", "1"))
+
+    # En proceso se llama a los endpoints directamente, sin ida y vuelta ASGI
+    client_cls = InProcessProbeClient if base_url.startswith("asgi://") else AsyncProbeClient
+    async with client_cls(base_url, timeout=timeout, verify=verify_tls) as client:
+        # Concurrencia acotada: con muchas regiones las conexiones del cliente se reutilizan
+        semaphore = asyncio.Semaphore(int(os.getenv("SYNTHETIC_CONCURRENCY", "16")))
+
+        async def bounded_probe(region: str) -> ProbeResult:
+            async with semaphore:
+                return await probe_region(client, region, device_token, samples)
 
-    async with AsyncProbeClient(base_url, timeout=timeout, verify=verify_tls) as client:
-        results = await asyncio.gather(*(probe_region(client, region, device_token) for region in regions))
+        async with asyncio.TaskGroup() as tg:
+            tasks = [tg.create_task(bounded_probe(region)) for region in regions]
+        results = [task.result() for task in tasks]
 
     for result in results:
         print(
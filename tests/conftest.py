@@ -0,0 +1,27 @@
+import os
+import pathlib
+import sys
+
+import pytest
+import pytest_asyncio
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+# Base SQLite en memoria compartida por toda la sesión de pruebas; se define
+# antes de importar la app para que motores y ``init_db`` usen este destino.
+os.environ["DATABASE_URL"] = "sqlite:///file:gps_tests?mode=memory&cache=shared&uri=true"
+
+from gps_tracker.database import init_db  # noqa: E402
+from gps_tracker.synthetic_client import AsyncProbeClient  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    init_db()
+
+
+@pytest_asyncio.fixture(scope="session")
+async def probe_client():
+    # Un único cliente ASGI (y un único lifespan de la app) para toda la sesión
+    async with AsyncProbeClient("asgi://local") as client:
+        yield client
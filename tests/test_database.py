@@ -0,0 +1,59 @@
+import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+from gps_tracker.database import (  # noqa: E402
+    _asyncpg_connect_args,
+    create_device,
+    create_user,
+    enable_positions_hypertable,
+    get_engine,
+    get_latest_position_async,
+    get_user_async,
+    init_db,
+    save_position,
+)
+from sqlalchemy import create_engine, inspect, text  # noqa: E402
+from sqlalchemy.engine import make_url  # noqa: E402
+
+
+def test_asyncpg_connect_args_translate_libpq_query():
+    url = make_url("postgresql://gps:secret@db/gps?sslmode=require&connect_timeout=10&application_name=api")
+
+    assert _asyncpg_connect_args(url.query) == {"ssl": "require", "timeout": 10.0}
+
+
+def test_enable_positions_hypertable_is_noop_on_sqlite():
+    engine = get_engine()
+    with engine.connect() as conn:
+        before = conn.execute(text("SELECT name, sql FROM sqlite_master ORDER BY name")).all()
+
+    enable_positions_hypertable(engine)
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT name, sql FROM sqlite_master ORDER BY name")).all() == before
+    assert "ix_positions_device_id_timestamp" in {name for name, _ in before}
+
+
+async def test_async_helpers_read_private_in_memory_sqlite(monkeypatch):
+    # ``sqlite://`` solo existe en la conexión del motor síncrono
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    init_db()
+    user = create_user("memory-user", "pass")
+    create_device("memory-dev", user=user, token="memory-token")
+    save_position("memory-dev", 1.0, 2.0)
+
+    assert (await get_user_async("memory-user")).id == user.id
+    assert (await get_latest_position_async("memory-dev")).latitude == 1.0
+
+
+def test_init_db_backfills_positions_index_on_existing_tables(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    init_db(engine=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_positions_device_id_timestamp"))
+
+    init_db(engine=engine)
+
+    assert "ix_positions_device_id_timestamp" in {index["name"] for index in inspect(engine).get_indexes("positions")}
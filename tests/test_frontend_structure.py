@@ -1,37 +1,45 @@
+import re
 from pathlib import Path
 
 HTML = Path("frontend/index.html").read_text(encoding="utf-8")
 
+CRUD_SECTIONS = [
+    "clients-section",
+    "users-section",
+    "roles-section",
+    "devices-section",
+    "plans-section",
+]
+FEATURE_LABELS = [
+    "Dashboards de estado",
+    "Geocercas y plantillas de alertas",
+    "Eventos y posiciones",
+    "Exportar CSV",
+    "Exportar PDF",
+]
+SAMPLE_DATA = ["Acme Corp", "Premium 10GB", "Vehículo 1"]
+DASHBOARD_WIDGETS = ["onlineCount", "offlineCount", "recentAlerts", "dataUsage", "map"]
+
+# Una sola pasada sobre el HTML con todas las marcas esperadas (las más largas primero)
+_TOKENS = sorted({*CRUD_SECTIONS, *FEATURE_LABELS, *SAMPLE_DATA, *DASHBOARD_WIDGETS}, key=len, reverse=True)
+_PRESENT = {match.group() for match in re.finditer("|".join(map(re.escape, _TOKENS)), HTML)}
+
 
 def test_crud_sections_present():
-    for section_id in [
-        "clients-section",
-        "users-section",
-        "roles-section",
-        "devices-section",
-        "plans-section",
-    ]:
-        assert section_id in HTML, f"Expected {section_id} in CRUD layout"
+    for section_id in CRUD_SECTIONS:
+        assert section_id in _PRESENT, f"Expected {section_id} in CRUD layout"
 
 
 def test_feature_blocks_present():
-    expected_labels = [
-        "Dashboards de estado",
-        "Geocercas y plantillas de alertas",
-        "Eventos y posiciones",
-        "Exportar CSV",
-        "Exportar PDF",
-    ]
-    for label in expected_labels:
-        assert label in HTML, f"Missing feature label: {label}"
+    for label in FEATURE_LABELS:
+        assert label in _PRESENT, f"Missing feature label: {label}"
 
 
 def test_sample_data_present():
-    assert "Acme Corp" in HTML
-    assert "Premium 10GB" in HTML
-    assert "Vehículo 1" in HTML
+    for sample in SAMPLE_DATA:
+        assert sample in _PRESENT
 
 
 def test_dashboard_widgets():
-    for widget_id in ["onlineCount", "offlineCount", "recentAlerts", "dataUsage", "map"]:
-        assert widget_id in HTML, f"Dashboard widget {widget_id} should exist"
+    for widget_id in DASHBOARD_WIDGETS:
+        assert widget_id in _PRESENT, f"Dashboard widget {widget_id} should exist"
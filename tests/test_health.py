@@ -1,4 +1,3 @@
-import asyncio
 import pathlib
 import sys
 
@@ -7,6 +6,6 @@ sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
 from gps_tracker.api import health
 
 
-def test_health_endpoint():
-    response = asyncio.run(health())
+async def test_health_endpoint():
+    response = await health()
     assert response == {"status": "ok"}
@@ -1,38 +1,33 @@
-import asyncio
-import os
 import pathlib
 import sys
+from datetime import datetime, timedelta
 
-sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+import pytest
+from fastapi import HTTPException
 
-# La base de datos se define antes de importar la app para que init_db use el destino correcto.
-os.environ["DATABASE_URL"] = "sqlite:///./test_ingest.db"
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
 
-from gps_tracker.api import ingest_http  # noqa: E402
+from gps_tracker import api  # noqa: E402
+from gps_tracker.api import ingest_http, ingest_http_batch, positions_geojson  # noqa: E402
 from gps_tracker.database import (  # noqa: E402
     create_device,
     create_user,
     get_all_positions,
+    get_all_positions_async,
     get_engine,
-    init_db,
+    get_position_coordinates,
+    save_positions_bulk,
 )
 from gps_tracker.api import IngestPayload  # noqa: E402
 
 
-def setup_module(module):
-    db_path = pathlib.Path("test_ingest.db")
-    if db_path.exists():
-        db_path.unlink()
-    init_db()
-
-
-def test_http_ingest_happy_path():
+async def test_http_ingest_happy_path():
     engine = get_engine()
     user = create_user("demo", "demo", engine=engine)
     device = create_device("dev-1", user=user, token="secret-token", engine=engine)
 
     payload = IngestPayload(latitude=40.0, longitude=-3.0, speed=50.0, ignition=True)
-    response = asyncio.run(ingest_http(payload, x_device_token=device.token))
+    response = await ingest_http(payload, x_device_token=device.token)
 
     assert response.device_id == device.id
     assert response.ignition is True
@@ -41,11 +36,74 @@ def test_http_ingest_happy_path():
     history = get_all_positions(device.id, engine=engine)
     assert len(history) == 1
     assert history[0].speed == 50.0
+    assert get_position_coordinates(device.id, engine=engine) == [(40.0, -3.0)]
+
+    async_history = await get_all_positions_async(device.id)
+    assert [pos.speed for pos in async_history] == [50.0]
 
 
-def test_http_ingest_rejects_invalid_token():
+async def test_http_ingest_rejects_invalid_token():
     payload = IngestPayload(latitude=0.0, longitude=0.0)
     try:
-        asyncio.run(ingest_http(payload, x_device_token="bad"))
+        await ingest_http(payload, x_device_token="bad")
     except Exception as exc:  # noqa: BLE001
         assert "Token de dispositivo inválido" in str(exc)
+
+
+def test_bulk_position_insert():
+    engine = get_engine()
+    user = create_user("bulk", "bulk", engine=engine)
+    device = create_device("dev-bulk", user=user, token="bulk-token", engine=engine)
+
+    save_positions_bulk(
+        [{"device_id": device.id, "latitude": 1.0 + idx, "longitude": 2.0} for idx in range(3)],
+        engine=engine,
+    )
+
+    assert len(get_all_positions(device.id, engine=engine)) == 3
+
+
+async def test_http_batch_ingest():
+    engine = get_engine()
+    user = create_user("batch", "batch", engine=engine)
+    device = create_device("dev-batch", user=user, token="batch-token", engine=engine)
+
+    payloads = [IngestPayload(latitude=10.0 + idx, longitude=20.0, speed=idx) for idx in range(3)]
+    response = await ingest_http_batch(payloads, x_device_token=device.token)
+
+    assert response.ingested == 3
+    assert len(get_all_positions("dev-batch", engine=engine)) == 3
+
+
+async def test_http_batch_ingest_rejects_oversized_batches(monkeypatch):
+    monkeypatch.setattr(api, "INGEST_BATCH_MAX_SIZE", 2)
+    payloads = [IngestPayload(latitude=10.0, longitude=20.0) for _ in range(3)]
+
+    with pytest.raises(HTTPException) as excinfo:
+        await ingest_http_batch(payloads, x_device_token="batch-token")
+
+    assert excinfo.value.status_code == 413
+
+
+async def test_positions_geojson_is_chronological():
+    engine = get_engine()
+    user = create_user("geojson", "geojson", engine=engine)
+    device = create_device("dev-geojson", user=user, token="geojson-token", engine=engine)
+    start = datetime(2024, 1, 1, 12, 0)
+    save_positions_bulk(
+        [
+            {
+                "device_id": device.id,
+                "latitude": 1.0 + idx,
+                "longitude": 2.0,
+                "timestamp": start + timedelta(minutes=idx),
+            }
+            for idx in (2, 0, 1)
+        ],
+        engine=engine,
+    )
+
+    # Las dos más recientes, de la más antigua a la más nueva
+    geojson = await positions_geojson(device.id, limit=2)
+
+    assert geojson == {"type": "LineString", "coordinates": [[2.0, 2.0], [2.0, 3.0]]}
@@ -0,0 +1,39 @@
+import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+from gps_tracker.payments import PaymentGateway  # noqa: E402
+
+PAYLOAD = b'{"type": "checkout.completed", "amount": 1000}'
+
+
+def test_verify_signature_accepts_valid_signature():
+    assert PaymentGateway.verify_signature(PaymentGateway.sign_payload(PAYLOAD), PAYLOAD)
+
+
+def test_verify_signature_accepts_uppercase_hex():
+    assert PaymentGateway.verify_signature(PaymentGateway.sign_payload(PAYLOAD).upper(), PAYLOAD)
+
+
+def test_verify_signature_rejects_other_payload():
+    assert not PaymentGateway.verify_signature(PaymentGateway.sign_payload(PAYLOAD), PAYLOAD + b" ")
+
+
+def test_verify_signature_rejects_wrong_length():
+    signature = PaymentGateway.sign_payload(PAYLOAD)
+
+    assert not PaymentGateway.verify_signature(signature[:-2], PAYLOAD)
+    assert not PaymentGateway.verify_signature(signature + "00", PAYLOAD)
+    assert not PaymentGateway.verify_signature("", PAYLOAD)
+
+
+def test_verify_signature_rejects_non_hex():
+    assert not PaymentGateway.verify_signature("zz" * 32, PAYLOAD)
+    # Misma longitud, pero con espacios que ``bytes.fromhex`` ignoraría
+    assert not PaymentGateway.verify_signature(" " + PaymentGateway.sign_payload(PAYLOAD)[1:], PAYLOAD)
+
+
+def test_verify_signature_rejects_non_ascii():
+    assert not PaymentGateway.verify_signature("é" * 64, PAYLOAD)
+    assert not PaymentGateway.verify_signature(PaymentGateway.sign_payload(PAYLOAD)[:-1] + "é", PAYLOAD)
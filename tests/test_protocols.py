@@ -0,0 +1,58 @@
+import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+from gps_tracker.protocols import ConcoxAdapter, DecodedPosition, QueclinkAdapter, decode_concox_batch  # noqa: E402
+
+CONCOX = ConcoxAdapter()
+QUECLINK = QueclinkAdapter()
+
+
+def _concox_frames(count: int) -> list[bytes]:
+    return [
+        CONCOX.simulate_payload(DecodedPosition(device_id=f"{idx:08x}", latitude=40.0 + idx, longitude=-3.5 - idx))
+        for idx in range(count)
+    ]
+
+
+def _assert_matches_adapter(payloads: list[bytes]) -> None:
+    assert decode_concox_batch(payloads).positions() == [CONCOX.decode_message(payload) for payload in payloads]
+
+
+def test_concox_batch_fast_path_matches_adapter():
+    _assert_matches_adapter(_concox_frames(5))
+
+
+def test_concox_batch_invalid_base64_matches_adapter():
+    frames = _concox_frames(3)
+    frames[1] = b"!!!!" + frames[1][4:]
+    _assert_matches_adapter(frames)
+
+
+def test_concox_batch_short_frames_match_adapter():
+    _assert_matches_adapter(_concox_frames(2) + [b"AAAAAAAAAAAAAA==", b"AAAA"])
+    _assert_matches_adapter(_concox_frames(2) + [b"AAAAAAAAAAAAAA=="])
+
+
+def test_queclink_complete_frame():
+    position = QUECLINK.decode_message(b"+RESP:GTFRI,dev-9,,,,,,40.5,-3.25,,,12.5,90,extra")
+
+    assert position == DecodedPosition(
+        device_id="dev-9", latitude=40.5, longitude=-3.25, speed=12.5, course=90.0, event_type="queclink"
+    )
+
+
+def test_queclink_truncated_frames_keep_defaults():
+    assert QUECLINK.decode_message(b"+RESP:GTFRI,dev-9,,,,,,40.5,-3.25,,,12.5") == DecodedPosition(
+        device_id="dev-9", latitude=40.5, longitude=-3.25, speed=12.5, event_type="queclink"
+    )
+    assert QUECLINK.decode_message(b"+RESP:GTFRI") == DecodedPosition(
+        device_id="unknown", latitude=0.0, longitude=0.0, event_type="queclink"
+    )
+
+
+def test_queclink_ignores_non_utf8_bytes():
+    position = QUECLINK.decode_message(b"+RESP:GTFRI,dev\xff-9,,,,,,40.5\xff,-3.25,,,12.5,9\xfe0")
+
+    assert (position.device_id, position.latitude, position.course) == ("dev-9", 40.5, 90.0)
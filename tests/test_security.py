@@ -0,0 +1,59 @@
+import base64
+import hashlib
+import hmac
+import pathlib
+import struct
+import sys
+
+import pytest
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+from gps_tracker import security  # noqa: E402
+from gps_tracker.security import generate_totp, verify_totp  # noqa: E402
+
+# Secreto ASCII "12345678901234567890" de los vectores SHA1 del RFC 6238
+RFC_SECRET = base64.b32encode(b"12345678901234567890").decode()
+NOW = 1_700_000_000
+
+
+def _reference_totp(secret: str, digits: int = 6, time_step: int = 30, for_time: int = 0) -> str:
+    # Implementación original, sin prototipos HMAC reutilizados
+    key = base64.b32decode(secret, casefold=True)
+    msg = struct.pack("!Q", int(for_time / time_step))
+    hmac_digest = hmac.new(key, msg, hashlib.sha1).digest()
+    offset = hmac_digest[-1] & 0x0F
+    binary = struct.unpack("!I", hmac_digest[offset:offset + 4])[0] & 0x7FFFFFFF
+    return str(binary % (10**digits)).zfill(digits)
+
+
+@pytest.mark.parametrize(
+    "for_time, expected",
+    [(59, "94287082"), (1111111109, "07081804"), (1234567890, "89005924"), (2000000000, "69279037")],
+)
+def test_generate_totp_rfc6238_vectors(for_time, expected):
+    assert generate_totp(RFC_SECRET, digits=8, for_time=for_time) == expected
+
+
+def test_generate_totp_matches_reference_implementation():
+    secret = security.generate_totp_secret()
+    for for_time in range(NOW, NOW + 30 * 50, 17):
+        for digits in (6, 8):
+            assert generate_totp(secret, digits=digits, for_time=for_time) == _reference_totp(
+                secret, digits=digits, for_time=for_time
+            )
+
+
+def test_verify_totp_accepts_codes_inside_drift_window(monkeypatch):
+    monkeypatch.setattr(security.time, "time", lambda: NOW)
+
+    for delta in (-1, 0, 1):
+        assert verify_totp(RFC_SECRET, generate_totp(RFC_SECRET, for_time=NOW + delta * 30))
+
+
+def test_verify_totp_rejects_codes_outside_drift_window(monkeypatch):
+    monkeypatch.setattr(security.time, "time", lambda: NOW)
+
+    for delta in (-2, 2):
+        assert not verify_totp(RFC_SECRET, generate_totp(RFC_SECRET, for_time=NOW + delta * 30))
+    assert not verify_totp(RFC_SECRET, "not-a-code")
@@ -1,15 +1,16 @@
 import asyncio
-import os
+import json
 import pathlib
 import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 import pytest
 
 sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
 
-from gps_tracker.synthetic_client import AsyncProbeClient
-
-os.environ["DATABASE_URL"] = "sqlite:///./test_synthetic.db"
+from gps_tracker.synthetic_client import AsyncProbeClient, InProcessProbeClient, ProbeResponse
 
 from gps_tracker.api import IngestPayload  # noqa: E402
 from gps_tracker.database import (  # noqa: E402
@@ -17,17 +18,9 @@ from gps_tracker.database import (  # noqa: E402
     create_user,
     get_engine,
     get_latest_position,
-    init_db,
 )
 
 
-def setup_module(module):
-    db_path = pathlib.Path("test_synthetic.db")
-    if db_path.exists():
-        db_path.unlink()
-    init_db()
-
-
 @pytest.fixture(scope="module")
 def device_token():
     engine = get_engine()
@@ -36,31 +29,35 @@ def device_token():
     return device.token
 
 
-def test_health_probe_multiple_regions():
+async def test_health_probe_multiple_regions(probe_client):
     regions = ["us-east-1", "eu-west-1", "sa-east-1"]
 
-    async def _run():
-        async with AsyncProbeClient("asgi://local") as client:
-            for region in regions:
-                response = await client.get("/health", headers={"X-Region": region})
-                assert response.status_code == 200
-                assert response.json() == {"status": "ok"}
+    for region in regions:
+        response = await probe_client.get("/health", headers={"X-Region": region})
+        assert response.status_code == 200
+        assert response.json() == {"status": "ok"}
+        assert response.json_field("status") == "ok"
 
-    asyncio.run(_run())
 
+def test_json_field_matches_full_decode():
+    response = ProbeResponse(200, b'{"status": null, "device_id": "dev-1"}', 0.0)
+    assert response.json_field("status", "missing") is None
+    assert response.json_field("other", "missing") == "missing"
+    assert response.json_field("device_id") == "dev-1"
 
-def test_ingestion_probe_from_region(device_token):
-    payload = IngestPayload(latitude=10.0, longitude=-70.0, speed=32.5, event_type="synthetic")
+    assert ProbeResponse(200, b"[1, 2]", 0.0).json_field("status", "missing") == "missing"
+    with pytest.raises(json.JSONDecodeError):
+        ProbeResponse(200, b"{not json", 0.0).json_field("status")
 
-    async def _run():
-        async with AsyncProbeClient("asgi://local") as client:
-            return await client.post(
-                "/ingest/http",
-                json_body=payload.dict(),
-                headers={"X-Device-Token": device_token, "X-Region": "eu-west-1"},
-            )
 
-    response = asyncio.run(_run())
+async def test_ingestion_probe_from_region(probe_client, device_token):
+    payload = IngestPayload(latitude=10.0, longitude=-70.0, speed=32.5, event_type="synthetic")
+
+    response = await probe_client.post(
+        "/ingest/http",
+        json_body=payload.dict(),
+        headers={"X-Device-Token": device_token, "X-Region": "eu-west-1"},
+    )
 
     assert response.status_code == 200
     body = response.json()
@@ -69,3 +66,123 @@ def test_ingestion_probe_from_region(device_token):
     latest = get_latest_position("synthetic-dev", engine=get_engine())
     assert latest is not None
     assert latest.event_type == "synthetic"
+
+
+async def test_in_process_probe_calls_endpoints_directly(device_token):
+    async with InProcessProbeClient() as client:
+        health = await client.get("/health", headers={"X-Region": "us-east-1"})
+        ingest = await client.post(
+            "/ingest/http",
+            json_body={"latitude": 1.0, "longitude": 2.0, "event_type": "in-process"},
+            headers={"X-Device-Token": device_token},
+        )
+        rejected = await client.post(
+            "/ingest/http",
+            json_body={"latitude": 1.0, "longitude": 2.0},
+            headers={"X-Device-Token": "invalid"},
+        )
+
+    assert health.json() == {"status": "ok"}
+    assert ingest.status_code == 200
+    assert ingest.json()["event_type"] == "in-process"
+    assert rejected.status_code == 401
+
+
+async def test_http_probe_does_not_resend_post_after_timeout():
+    received: list[str] = []
+
+    class SlowIngest(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            self._reply()
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            received.append(self.path)
+            time.sleep(0.5)
+            self._reply()
+
+        def _reply(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowIngest)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        async with AsyncProbeClient(base_url, timeout=0.2, use_native=False) as client:
+            # El GET deja una conexión keep-alive en el pool; el POST la reutiliza
+            assert (await client.get("/health")).status_code == 200
+            with pytest.raises(TimeoutError):
+                await client.post("/ingest/http", json_body={"latitude": 1.0, "longitude": 1.0})
+        await asyncio.sleep(0.6)
+        assert received == ["/ingest/http"]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class _RecordingHandler(BaseHTTPRequestHandler):
+    """Responde ``/moved`` con una redirección y el resto con JSON, anotando cada petición."""
+
+    protocol_version = "HTTP/1.1"
+    requests: list[tuple[str, str]] = []
+
+    def do_GET(self):
+        self.requests.append(("GET", self.path))
+        if self.path.endswith("/moved"):
+            self.send_response(302)
+            self.send_header("Location", "/health")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", "15")
+        self.end_headers()
+        self.wfile.write(b'{"status":"ok"}')
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve(handler: type[BaseHTTPRequestHandler]) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def test_http_probe_follows_redirects():
+    handler = type("Redirecting", (_RecordingHandler,), {"requests": []})
+    server = _serve(handler)
+    try:
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        async with AsyncProbeClient(base_url, use_native=False) as client:
+            response = await client.get("/moved")
+        assert response.status_code == 200
+        assert response.json_field("status") == "ok"
+        assert handler.requests == [("GET", "/moved"), ("GET", "/health")]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+async def test_http_probe_uses_http_proxy_from_environment(monkeypatch):
+    handler = type("Proxy", (_RecordingHandler,), {"requests": []})
+    server = _serve(handler)
+    monkeypatch.setenv("HTTP_PROXY", f"http://127.0.0.1:{server.server_address[1]}")
+    for name in ("http_proxy", "NO_PROXY", "no_proxy"):
+        monkeypatch.delenv(name, raising=False)
+    try:
+        async with AsyncProbeClient("http://probe.invalid", use_native=False) as client:
+            response = await client.get("/health")
+        assert response.status_code == 200
+        assert handler.requests == [("GET", "http://probe.invalid/health")]
+    finally:
+        server.shutdown()
+        server.server_close()